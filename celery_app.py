@@ -1,9 +1,20 @@
 # celery_app.py
 import os
+import threading
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_init, worker_process_init, worker_shutdown
 
-BROKER_URL = os.getenv("CELERY_BROKER_URL", "sqla+sqlite:///./celery_broker.sqlite")
-RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "db+sqlite:///./celery_results.sqlite")
+# Redis by default; set CELERY_USE_SQLITE=true for a dependency-free dev setup
+if os.getenv("CELERY_USE_SQLITE", "false").lower() in ("1", "true", "yes"):
+    DEFAULT_BROKER_URL = "sqla+sqlite:///./celery_broker.sqlite"
+    DEFAULT_RESULT_BACKEND = "db+sqlite:///./celery_results.sqlite"
+else:
+    DEFAULT_BROKER_URL = "redis://localhost:6379/0"
+    DEFAULT_RESULT_BACKEND = "redis://localhost:6379/1"
+
+BROKER_URL = os.getenv("CELERY_BROKER_URL", DEFAULT_BROKER_URL)
+RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", DEFAULT_RESULT_BACKEND)
 
 celery = Celery(
     "job_processor",
@@ -11,10 +22,98 @@ celery = Celery(
     backend=RESULT_BACKEND,
 )
 
-# Optional tuning for SQLite
 celery.conf.task_track_started = True
 celery.conf.task_ignore_result = False
+celery.conf.result_expires = 3600
+# Redelivery window for unacknowledged (acks_late) messages
+celery.conf.broker_transport_options = {"visibility_timeout": 3600}
+celery.conf.result_backend_transport_options = {"visibility_timeout": 3600}
+
+# Jobs run as a chain of short tasks; acknowledge after completion so a lost
+# worker's step is redelivered, and hand out one message at a time so long
+# steps don't hold short ones back (fair scheduling)
+celery.conf.task_acks_late = True
+celery.conf.worker_prefetch_multiplier = 1
+# Resume and job description travel between steps; compress them
+celery.conf.task_compression = "gzip"
+
+# Tasks spend most of their time waiting on Vertex AI and LibreOffice, so a
+# thread pool keeps many jobs in flight per process. For higher fan-out run
+# the worker with `--pool=gevent --concurrency=50`, which also monkey-patches
+# the standard library before tasks are imported.
+celery.conf.worker_pool = os.getenv("CELERY_WORKER_POOL", "threads")
+celery.conf.worker_concurrency = int(os.getenv("CELERY_WORKER_CONCURRENCY", "32"))
+celery.conf.broker_pool_limit = None
+celery.conf.broker_connection_retry_on_startup = True
+
+# Set PDF_QUEUE (e.g. "pdf") to send PDF conversions to their own queue, served
+# by a separate process-pool worker:
+#   celery -A celery_app.celery worker -Q pdf --pool=prefork --concurrency=$(nproc)
+PDF_QUEUE = os.getenv("PDF_QUEUE")
+if PDF_QUEUE:
+    celery.conf.task_routes = {"lib.tasks.render_pdf_task": {"queue": PDF_QUEUE}}
 
 # Import tasks
 celery.conf.imports = ["lib.tasks"]
 
+# Nightly cleanup of expired LLM cache entries (run `celery beat` to enable)
+celery.conf.beat_schedule = {
+    "sweep-llm-cache": {
+        "task": "lib.tasks.sweep_llm_cache",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
+
+
+# Build Vertex AI clients lazily in each forked worker instead of inheriting
+# the parent's credential handles
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    from lib.llm import reset_llm_clients
+    reset_llm_clients()
+
+
+# A pool of headless LibreOffice instances per worker node serves every PDF
+# conversion (shared by all of its pool processes); the worker's main process
+# restarts any that exit. Workers on the same host need distinct UNOSERVER_PORT
+# ranges, or UNOSERVER_ENABLED on only one of them.
+_unoserver_processes = []
+_unoserver_stop = threading.Event()
+_unoserver_supervisor = None
+
+@worker_init.connect
+def _start_pdf_daemon(**kwargs):
+    global _unoserver_processes, _unoserver_supervisor
+    from utils.pdf_utils import UNOSERVER_ENABLED, start_unoserver_pool, supervise_unoserver_pool
+    if UNOSERVER_ENABLED:
+        try:
+            _unoserver_processes = start_unoserver_pool()
+        except FileNotFoundError:
+            print("unoserver not installed; PDFs will be converted with a new soffice per task")
+        else:
+            _unoserver_supervisor = supervise_unoserver_pool(_unoserver_processes, _unoserver_stop)
+
+@worker_shutdown.connect
+def _stop_pdf_daemon(**kwargs):
+    from utils.pdf_utils import stop_unoserver_pool
+    _unoserver_stop.set()
+    if _unoserver_supervisor is not None:
+        # Let a restart in progress finish, so it is stopped below too
+        _unoserver_supervisor.join()
+    stop_unoserver_pool(_unoserver_processes)
+
+@worker_init.connect
+def _create_output_dir(**kwargs):
+    from lib.tasks import OUTPUT_DIR
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# Split the resume template around its placeholder before any task runs;
+# forked pool processes inherit the prepared parts
+@worker_init.connect
+def _preload_resume_template(**kwargs):
+    from lib.pdf_utils import load_template
+    from utils.file_utils import get_resume_template
+    try:
+        load_template(get_resume_template())
+    except OSError as e:
+        print(f"Resume template not preloaded: {e}")
@@ -5,28 +5,24 @@ Resume AI - CLI Interface
 This module provides the command-line interface for the Resume AI application.
 """
 import argparse
+import asyncio
+import os
 import sys
 from pathlib import Path
 from typing import Optional
 
-from lib.cover_letter_generator import generate_cover_letter, save_cover_letter
-from lib.objective_generator import generate_career_objective
+from lib.cover_letter_generator import generate_cover_letter_async, save_cover_letter
+from lib.objective_generator import generate_career_objective_async
 from lib.pdf_utils import update_resume_objective, create_pdf_from_docx
+from utils.file_utils import get_resume_content, get_resume_template
 
-def get_resume_content() -> str:
-    """Read the default resume content."""
-    resume_path = Path("input/resume.md")
-    if not resume_path.exists():
-        raise FileNotFoundError("Default resume.md not found in input/ directory")
-    with open(resume_path, 'r') as f:
-        return f.read()
+# Job descriptions processed at once in --jobs mode
+MAX_CONCURRENT_JOBS = 8
 
-def get_resume_template() -> str:
-    """Get the path to the resume template."""
-    template_path = Path("input/resume.docx")
-    if not template_path.exists():
-        raise FileNotFoundError("resume.docx not found in input/ directory")
-    return str(template_path)
+def print_chunk(chunk: str) -> None:
+    """Echo a streamed LLM chunk to stderr as soon as it arrives."""
+    sys.stderr.write(chunk)
+    sys.stderr.flush()
 
 def check_required_files() -> tuple[bool, str]:
     """Check if required input files exist.
@@ -34,14 +30,20 @@ def check_required_files() -> tuple[bool, str]:
     Returns:
         Tuple of (success, message)
     """
-    input_dir = Path("input")
     required_files = {
-        'resume': input_dir / 'resume.md',
-        'job_description': input_dir / 'jobdescription.txt',
-        'resume_template': input_dir / 'resume.docx'
+        'resume': 'resume.md',
+        'job_description': 'jobdescription.txt',
+        'resume_template': 'resume.docx'
     }
     
-    missing = [name for name, path in required_files.items() if not path.exists()]
+    # One directory listing instead of a stat() per file
+    try:
+        with os.scandir("input") as entries:
+            present = {entry.name for entry in entries}
+    except FileNotFoundError:
+        present = set()
+    
+    missing = [name for name, file_name in required_files.items() if file_name not in present]
     if missing:
         return False, f"Missing required files: {', '.join(missing)}. Please add them to the 'input' directory."
     return True, ""
@@ -53,7 +55,8 @@ def parse_arguments():
     
     # Parser for generate command
     generate_parser = subparsers.add_parser('generate', help='Generate a new resume with objective')
-    generate_parser.add_argument('job_description', help='Path to job description file')
+    generate_parser.add_argument('job_description', nargs='?', help='Path to job description file')
+    generate_parser.add_argument('--jobs', metavar='DIR', help='Generate for every .txt job description in DIR instead')
     generate_parser.add_argument('--cv', action='store_true', help='Generate a cover letter')
     generate_parser.add_argument('--company', default='the company', help='Company name for personalization')
     generate_parser.add_argument('--pdf', action='store_true', help='Generate PDF version of the resume')
@@ -62,64 +65,101 @@ def parse_arguments():
     api_parser = subparsers.add_parser('api', help='Run the API server')
     api_parser.add_argument('--host', default='0.0.0.0', help='Host to run the API server on')
     api_parser.add_argument('--port', type=int, default=8000, help='Port to run the API server on')
+    api_parser.add_argument('--reload', action='store_true', help='Reload the API server on code changes (development)')
     
     return parser.parse_args()
 
+async def build_application(resume_content: str, job_description: str, company_name: str,
+                            generate_cv: bool, generate_pdf: bool, output_path: Path,
+                            stream: bool = True) -> dict:
+    """Generate the tailored resume and, if requested, its PDF and a cover letter.
+    
+    The cover letter only depends on the inputs, so it is generated while the
+    objective is written into the resume and the PDF is rendered.
+    
+    Args:
+        stream: Echo the model output and progress; without it, the LLM calls
+            go through the shared prompt batcher
+    
+    Returns:
+        Dict with the objective, the output paths and, if requested, the cover letter
+    """
+    cover_letter_task = None
+    if generate_cv:
+        # Only the letter is echoed so the two streams don't interleave
+        cover_letter_task = asyncio.create_task(generate_cover_letter_async(
+            resume_content=resume_content,
+            job_description=job_description,
+            company_name=company_name,
+            on_chunk=print_chunk if stream else None
+        ))
+    
+    objective, _ = await generate_career_objective_async(
+        resume_content=resume_content,
+        job_description=job_description,
+        on_chunk=print_chunk if stream and not generate_cv else None
+    )
+    
+    # DOCX and PDF work blocks, so run it in a thread while the letter streams in
+    if stream:
+        print("Updating resume...")
+    updated_resume_path = await asyncio.to_thread(
+        update_resume_objective,
+        source_path=get_resume_template(),
+        output_path=str(output_path),
+        new_objective=objective
+    )
+    
+    result = {
+        "status": "success",
+        "objective": objective,
+        "resume_docx": str(updated_resume_path)
+    }
+    
+    # Generate PDF if requested
+    if generate_pdf:
+        if stream:
+            print("Generating PDF...")
+        result["resume_pdf"] = await asyncio.to_thread(
+            create_pdf_from_docx, updated_resume_path, str(output_path.parent)
+        )
+    
+    if cover_letter_task is not None:
+        result["cover_letter"] = await cover_letter_task
+    return result
+
 def process_job_application_cli(job_description_path: str, generate_cv: bool = False, 
                              company_name: str = "the company", generate_pdf: bool = False):
     """Process a job application from the command line."""
     try:
+        # Output paths are all derived from the job description's name
+        job_description_file = Path(job_description_path)
+        stem = job_description_file.stem
+        output_dir = Path("generated")
+        output_path = output_dir / f"resume_{stem}.docx"
+        cover_letter_path = output_dir / f"cover_letter_{stem}.txt"
+        
         # Read job description
-        with open(job_description_path, 'r') as f:
-            job_description = f.read()
+        job_description = job_description_file.read_text(encoding='utf-8')
         
         # Read resume content
         resume_content = get_resume_content()
         
-        # Generate objective
-        print("Generating career objective...")
-        objective = generate_career_objective(
+        # Generate objective (and cover letter, if requested)
+        print("Generating career objective and cover letter..." if generate_cv else "Generating career objective...")
+        result = asyncio.run(build_application(
             resume_content=resume_content,
-            job_description=job_description
-        )
-        
-        # Update resume
-        print("Updating resume...")
-        output_dir = Path("generated")
-        output_path = output_dir / f"resume_{Path(job_description_path).stem}.docx"
-        
-        updated_resume_path = update_resume_objective(
-            source_path=get_resume_template(),
-            output_path=str(output_path),
-            new_objective=objective
-        )
+            job_description=job_description,
+            company_name=company_name,
+            generate_cv=generate_cv,
+            generate_pdf=generate_pdf,
+            output_path=output_path
+        ))
+        print(file=sys.stderr)
         
-        result = {
-            "status": "success",
-            "objective": objective,
-            "resume_docx": str(updated_resume_path)
-        }
-        
-        # Generate PDF if requested
-        if generate_pdf:
-            print("Generating PDF...")
-            pdf_path = create_pdf_from_docx(updated_resume_path, str(output_dir))
-            result["resume_pdf"] = pdf_path
-        
-        # Generate cover letter if requested
+        # Save cover letter if requested
         if generate_cv:
-            print("Generating cover letter...")
-            cover_letter = generate_cover_letter(
-                resume_content=resume_content,
-                job_description=job_description,
-                company_name=company_name
-            )
-            
-            # Save cover letter
-            cover_letter_path = output_dir / f"cover_letter_{Path(job_description_path).stem}.txt"
-            save_cover_letter(cover_letter, str(cover_letter_path))
-            
-            result["cover_letter"] = cover_letter
+            save_cover_letter(result["cover_letter"], str(cover_letter_path))
             result["cover_letter_path"] = str(cover_letter_path)
         
         print("\nJob application processed successfully!")
@@ -133,12 +173,82 @@ def process_job_application_cli(job_description_path: str, generate_cv: bool = F
         print(f"Error: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
+async def build_applications(job_description_files: list[Path], company_name: str,
+                             generate_cv: bool, generate_pdf: bool) -> list:
+    """Generate applications for several job descriptions concurrently.
+    
+    At most MAX_CONCURRENT_JOBS run at once; their LLM calls are batched
+    together by the prompt batcher.
+    
+    Returns:
+        One result dict per file, or the exception that job failed with
+    """
+    resume_content = get_resume_content()
+    output_dir = Path("generated")
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+    
+    async def build_one(job_description_file: Path) -> dict:
+        async with semaphore:
+            stem = job_description_file.stem
+            result = await build_application(
+                resume_content=resume_content,
+                job_description=job_description_file.read_text(encoding='utf-8'),
+                company_name=company_name,
+                generate_cv=generate_cv,
+                generate_pdf=generate_pdf,
+                output_path=output_dir / f"resume_{stem}.docx",
+                stream=False
+            )
+            if generate_cv:
+                cover_letter_path = output_dir / f"cover_letter_{stem}.txt"
+                await asyncio.to_thread(save_cover_letter, result["cover_letter"], str(cover_letter_path))
+                result["cover_letter_path"] = str(cover_letter_path)
+            return result
+    
+    return await asyncio.gather(
+        *(build_one(path) for path in job_description_files),
+        return_exceptions=True
+    )
+
+def process_jobs_cli(jobs_dir: str, generate_cv: bool = False,
+                     company_name: str = "the company", generate_pdf: bool = False):
+    """Process every job description (*.txt) in a directory from the command line."""
+    job_description_files = sorted(Path(jobs_dir).glob("*.txt"))
+    if not job_description_files:
+        print(f"Error: No .txt job descriptions found in {jobs_dir}", file=sys.stderr)
+        sys.exit(1)
+    
+    print(f"Processing {len(job_description_files)} job descriptions...")
+    results = asyncio.run(build_applications(job_description_files, company_name, generate_cv, generate_pdf))
+    
+    failed = 0
+    for path, result in zip(job_description_files, results):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"{path.name}: Error: {result}", file=sys.stderr)
+            continue
+        outputs = [result['resume_docx'], result.get('resume_pdf'), result.get('cover_letter_path')]
+        print(f"{path.name}: {', '.join(output for output in outputs if output)}")
+    
+    if failed:
+        sys.exit(1)
+
 def main():
     """Main entry point for the CLI interface."""
     try:
         args = parse_arguments()
         
-        if args.command == 'generate':
+        if args.command == 'generate' and args.jobs:
+            process_jobs_cli(
+                jobs_dir=args.jobs,
+                generate_cv=args.cv,
+                company_name=args.company,
+                generate_pdf=args.pdf
+            )
+        elif args.command == 'generate':
+            if not args.job_description:
+                print("Error: Give a job description file or --jobs DIR", file=sys.stderr)
+                sys.exit(1)
             process_job_application_cli(
                 job_description_path=args.job_description,
                 generate_cv=args.cv,
@@ -150,7 +260,7 @@ def main():
             from main import run_api
             print(f"Starting API server at http://{args.host}:{args.port}")
             print(f"API documentation available at http://{args.host}:{args.port}/docs")
-            run_api(host=args.host, port=args.port)
+            run_api(host=args.host, port=args.port, reload=args.reload)
         else:
             print(f"Unknown command: {args.command}")
             sys.exit(1)
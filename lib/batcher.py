@@ -0,0 +1,85 @@
+import asyncio
+import os
+from lib.llm import get_llm
+
+class PromptBatcher:
+    """
+    Coalesce concurrent prompts into a single LangChain abatch call.
+
+    Prompts submitted on the same event loop within max_wait_seconds of the
+    first one, up to max_batch_size of them, are sent together and each
+    caller gets back its own response text. This is the asyncio counterpart
+    of BatchedObjectiveGenerator, used by the API's direct endpoints.
+    """
+
+    def __init__(self, max_batch_size: int = 8, max_wait_seconds: float = 0.05):
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._queue = None
+        self._worker = None
+        self._in_flight = set()
+
+    async def submit(self, prompt: str) -> str:
+        """
+        Queue a prompt and wait for its response.
+
+        Args:
+            prompt: The formatted prompt
+
+        Returns:
+            The response text
+        """
+        if self.max_batch_size <= 1:
+            response = await get_llm().ainvoke(prompt)
+            return response.content
+
+        future = asyncio.get_running_loop().create_future()
+        self._ensure_worker()
+        self._queue.put_nowait((prompt, future))
+        return await future
+
+    def _ensure_worker(self) -> None:
+        # One drain task per event loop; asyncio.run() in the CLI makes a new loop each time
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Keep collecting the next batch while this one is in flight
+            task = loop.create_task(self._process(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _process(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        try:
+            responses = await get_llm().abatch([prompt for prompt, _ in batch], return_exceptions=True)
+        except Exception as e:
+            responses = [e] * len(batch)
+
+        for (_, future), response in zip(batch, responses):
+            if future.done():
+                # Caller went away (e.g. client disconnected)
+                continue
+            if isinstance(response, Exception):
+                future.set_exception(response)
+            else:
+                future.set_result(response.content)
+
+prompt_batcher = PromptBatcher(
+    max_batch_size=int(os.getenv("PROMPT_BATCH_SIZE", "8")),
+    max_wait_seconds=int(os.getenv("PROMPT_BATCH_WAIT_MS", "50")) / 1000
+)
@@ -0,0 +1,312 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from utils import write_file_atomic
+
+CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", "generated/.cache"))
+CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_DAYS", "30")) * 24 * 60 * 60
+
+# Arguments that don't affect the result, such as streaming callbacks
+_UNKEYED_ARGS = frozenset({'on_chunk'})
+
+def _cache_key(func, args: tuple, kwargs: dict, skip: frozenset = _UNKEYED_ARGS) -> str:
+    """Hash the function name and its bound arguments (except those in skip) into a cache key."""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    values = [str(value) for name, value in bound.arguments.items() if name not in skip]
+    payload = "|".join([func.__qualname__, *values])
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+_MISS = object()
+
+def _streams(func, args: tuple, kwargs: dict) -> bool:
+    """Whether the call passes an on_chunk callback to stream the response."""
+    return inspect.signature(func).bind(*args, **kwargs).arguments.get('on_chunk') is not None
+
+class Uncached(Exception):
+    """
+    Raised by a cached generator to return a result without caching it.
+
+    Meant for fallbacks after an unusable LLM response, so the next call asks
+    the model again instead of getting the fallback for the cache's TTL. The
+    generator must be decorated with returns_uncached outside its cache
+    decorators, which turns the exception back into a return value.
+    """
+
+    def __init__(self, result):
+        super().__init__(result)
+        self.result = result
+
+def returns_uncached(func):
+    """Return the result of an Uncached raised by func (see Uncached)."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Uncached as e:
+                return e.result
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Uncached as e:
+                return e.result
+
+    return wrapper
+
+def memory_cached(maxsize: int = 256):
+    """
+    Cache a generator's result in process memory, keyed by its arguments.
+    
+    Keeps the maxsize most recently used results, so retries and repeated
+    submissions within one worker skip both the LLM and the disk cache.
+    Concurrent calls with the same arguments are coalesced: callers that
+    arrive while the first one is still running wait for its result instead
+    of making their own request. Streaming calls (with an on_chunk callback)
+    are not coalesced, since a caller joining another's request would get no
+    chunks; they still use and fill the cache. Works for both regular and
+    async functions.
+
+    The wrapper's cache_get(*args, **kwargs) and cache_set(result, *args,
+    **kwargs) read and write the cache (and the cache decorators below it)
+    without calling the function, for callers that produce results another
+    way, such as a batched prompt. For async functions they are coroutines.
+    """
+    def decorator(func):
+        entries = OrderedDict()
+        in_flight = {}
+        lock = threading.Lock()
+
+        def lookup(key):
+            with lock:
+                if key not in entries:
+                    return _MISS
+                entries.move_to_end(key)
+                return entries[key]
+
+        def store(key, result):
+            with lock:
+                entries[key] = result
+                if len(entries) > maxsize:
+                    entries.popitem(last=False)
+
+        if inspect.iscoroutinefunction(func):
+            async def compute(key, args, kwargs):
+                try:
+                    result = await func(*args, **kwargs)
+                    store(key, result)
+                    return result
+                finally:
+                    # A caller on another event loop may have replaced this entry
+                    if in_flight.get(key) is asyncio.current_task():
+                        del in_flight[key]
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = _cache_key(func, args, kwargs)
+                result = lookup(key)
+                if result is not _MISS:
+                    return result
+                if _streams(func, args, kwargs):
+                    result = await func(*args, **kwargs)
+                    store(key, result)
+                    return result
+
+                loop = asyncio.get_running_loop()
+                task = in_flight.get(key)
+                if task is None or task.get_loop() is not loop:
+                    task = in_flight[key] = loop.create_task(compute(key, args, kwargs))
+                # Shielded, so one caller going away doesn't cancel the others' request
+                return await asyncio.shield(task)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = _cache_key(func, args, kwargs)
+                streaming = _streams(func, args, kwargs)
+                with lock:
+                    if key in entries:
+                        entries.move_to_end(key)
+                        return entries[key]
+                    if not streaming:
+                        future = in_flight.get(key)
+                        owner = future is None
+                        if owner:
+                            future = in_flight[key] = Future()
+
+                if streaming:
+                    result = func(*args, **kwargs)
+                    store(key, result)
+                    return result
+
+                if not owner:
+                    return future.result()
+
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as e:
+                    with lock:
+                        in_flight.pop(key, None)
+                    future.set_exception(e)
+                    raise
+                store(key, result)
+                with lock:
+                    in_flight.pop(key, None)
+                future.set_result(result)
+                return result
+
+        if inspect.iscoroutinefunction(func):
+            async def cache_get(*args, **kwargs):
+                key = _cache_key(func, args, kwargs)
+                result = lookup(key)
+                if result is not _MISS:
+                    return result
+                result = await _ainner_cache_get(func, args, kwargs)
+                if result is not None:
+                    store(key, result)
+                return result
+
+            async def cache_set(result, *args, **kwargs):
+                store(_cache_key(func, args, kwargs), result)
+                await _ainner_cache_set(func, result, args, kwargs)
+        else:
+            def cache_get(*args, **kwargs):
+                key = _cache_key(func, args, kwargs)
+                result = lookup(key)
+                if result is not _MISS:
+                    return result
+                result = _inner_cache_get(func, args, kwargs)
+                if result is not None:
+                    store(key, result)
+                return result
+
+            def cache_set(result, *args, **kwargs):
+                store(_cache_key(func, args, kwargs), result)
+                _inner_cache_set(func, result, args, kwargs)
+
+        wrapper.cache_clear = entries.clear
+        wrapper.cache_get = cache_get
+        wrapper.cache_set = cache_set
+        return wrapper
+
+    return decorator
+
+def _inner_cache_get(func, args: tuple, kwargs: dict):
+    # Look further down the decorator stack; None when there is no cache below
+    cache_get = getattr(func, 'cache_get', None)
+    return cache_get(*args, **kwargs) if cache_get is not None else None
+
+def _inner_cache_set(func, result, args: tuple, kwargs: dict) -> None:
+    cache_set = getattr(func, 'cache_set', None)
+    if cache_set is not None:
+        cache_set(result, *args, **kwargs)
+
+async def _ainner_cache_get(func, args: tuple, kwargs: dict):
+    cache_get = getattr(func, 'cache_get', None)
+    return await cache_get(*args, **kwargs) if cache_get is not None else None
+
+async def _ainner_cache_set(func, result, args: tuple, kwargs: dict) -> None:
+    cache_set = getattr(func, 'cache_set', None)
+    if cache_set is not None:
+        await cache_set(result, *args, **kwargs)
+
+def disk_cached(func):
+    """
+    Cache a generator's JSON-serializable result on disk, keyed by its arguments.
+
+    Entries live in CACHE_DIR as {hash}.json and are written atomically, so
+    concurrent workers can share the cache. Lists read back from JSON are
+    returned as tuples to match the generators' return types. Works for both
+    regular and async functions. Like memory_cached, the wrapper has
+    cache_get and cache_set.
+    """
+    if inspect.iscoroutinefunction(func):
+        # File I/O runs in a thread, off the event loop
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_path = CACHE_DIR / f"{_cache_key(func, args, kwargs)}.json"
+            result = await asyncio.to_thread(_read_entry, cache_path)
+            if result is _MISS:
+                result = await func(*args, **kwargs)
+                await asyncio.to_thread(write_file_atomic, str(cache_path), json.dumps(result))
+            return result
+
+        async def cache_get(*args, **kwargs):
+            cache_path = CACHE_DIR / f"{_cache_key(func, args, kwargs)}.json"
+            result = await asyncio.to_thread(_read_entry, cache_path)
+            if result is not _MISS:
+                return result
+            result = await _ainner_cache_get(func, args, kwargs)
+            if result is not None:
+                await asyncio.to_thread(write_file_atomic, str(cache_path), json.dumps(result))
+            return result
+
+        async def cache_set(result, *args, **kwargs):
+            cache_path = CACHE_DIR / f"{_cache_key(func, args, kwargs)}.json"
+            await asyncio.to_thread(write_file_atomic, str(cache_path), json.dumps(result))
+            await _ainner_cache_set(func, result, args, kwargs)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_path = CACHE_DIR / f"{_cache_key(func, args, kwargs)}.json"
+            result = _read_entry(cache_path)
+            if result is _MISS:
+                result = func(*args, **kwargs)
+                write_file_atomic(str(cache_path), json.dumps(result))
+            return result
+
+        def cache_get(*args, **kwargs):
+            cache_path = CACHE_DIR / f"{_cache_key(func, args, kwargs)}.json"
+            result = _read_entry(cache_path)
+            if result is not _MISS:
+                return result
+            result = _inner_cache_get(func, args, kwargs)
+            if result is not None:
+                write_file_atomic(str(cache_path), json.dumps(result))
+            return result
+
+        def cache_set(result, *args, **kwargs):
+            write_file_atomic(str(CACHE_DIR / f"{_cache_key(func, args, kwargs)}.json"), json.dumps(result))
+            _inner_cache_set(func, result, args, kwargs)
+
+    wrapper.cache_get = cache_get
+    wrapper.cache_set = cache_set
+    return wrapper
+
+def _read_entry(cache_path: Path):
+    try:
+        cached = json.loads(cache_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return _MISS
+    return tuple(cached) if isinstance(cached, list) else cached
+
+def sweep_cache(max_age_seconds: int = CACHE_TTL_SECONDS) -> int:
+    """
+    Delete cache entries older than max_age_seconds.
+
+    Args:
+        max_age_seconds: Maximum age of an entry, based on its modification time
+
+    Returns:
+        Number of entries removed
+    """
+    if not CACHE_DIR.exists():
+        return 0
+
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    with os.scandir(CACHE_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+                Path(entry.path).unlink(missing_ok=True)
+                removed += 1
+    return removed
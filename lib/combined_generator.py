@@ -0,0 +1,124 @@
+from typing import Optional
+from langchain.prompts import PromptTemplate
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, Field, ValidationError
+from lib.cache import Uncached, disk_cached, memory_cached, returns_uncached
+from lib.cover_letter_generator import generate_cover_letter
+from lib.llm import get_llm, trim_prompt_inputs
+from utils import clean_text_for_filename
+
+class ApplicationContent(BaseModel):
+    """Structured response of the combined prompt."""
+    objective: str = Field(description="The career objective, 2-3 sentences")
+    role: str = Field(description="The job role from the job description")
+    company: str = Field(description="The hiring company's name from the job description")
+
+class ApplicationContentWithCoverLetter(ApplicationContent):
+    """Structured response of the combined prompt when a cover letter is requested."""
+    cover_letter: str = Field(description="The full plain-text cover letter, including its subject")
+
+_COVER_LETTER_INSTRUCTIONS = """
+    Also write a cover letter for the job application.
+
+    Cover letter notes:
+
+    1. Make sure to provide the cover letter in the format of a professional cover letter.
+    2. Do not use any formatting. Use plain text
+    3. Include a subject for the cover letter.
+    4. Make it short and to the point.
+    5. Make it under 2-3 paragraph max. But try to keep it under 2 paragraph.
+    6. Most of the time try to use the resume content to generate the cover letter.
+    7. Do not include any skills or experiences that is not included in the resume.
+    8. Do not include any skills or experiences that is not included in the job description.
+    9. Try to make the 2nd paragraph in bullet points that are related to the job description and why I am a good fit for the job.
+    """
+
+def _prompt_template(want_cv: bool) -> PromptTemplate:
+    # Static text first and the job description last, so requests share the
+    # longest possible prefix for Gemini's implicit context caching
+    return PromptTemplate.from_template("""
+        Based on the resume and job description below, generate a career objective that is 2-3 sentences in length. The objective should highlight the most relevant skills and experiences from the resume that match the job requirements. Also extract the job role and the company name from the job description.
+        """ + (_COVER_LETTER_INSTRUCTIONS if want_cv else "") + """
+        Resume:
+        {resume}
+
+        Write in a {tone} tone""" + (", for a job application at {company_name}" if want_cv else "") + """.
+
+        Job Description:
+        {job_description}
+        """)
+
+# Built once at import, one per want_cv value
+_PROMPTS = {want_cv: _prompt_template(want_cv) for want_cv in (True, False)}
+_SCHEMAS = {True: ApplicationContentWithCoverLetter, False: ApplicationContent}
+
+@returns_uncached
+@memory_cached()
+@disk_cached
+def generate_combined(
+    resume_content: str,
+    job_description: str,
+    company_name: str = "the company",
+    tone: str = "professional",
+    want_cv: bool = True
+) -> tuple[str, str, Optional[str]]:
+    """
+    Generate the career objective, filename and (optionally) the cover letter in one LLM call.
+
+    The model answers with structured output (ApplicationContent), so there
+    is no free-text response to parse; the filename is built from the
+    extracted role and company.
+
+    Args:
+        resume_content: The content of the resume
+        job_description: The job description
+        company_name: Name of the company (for personalization)
+        tone: Tone of the generated content ('professional', 'enthusiastic', 'formal')
+        want_cv: Whether to also generate a cover letter
+
+    Returns:
+        Tuple of (objective, filename, cover_letter); cover_letter is None when want_cv is False
+    """
+    # Always the full prompt on the shared client, never a Vertex AI context
+    # cache: ChatVertexAI drops tools when cached_content is set, so the
+    # structured output would never be filled in
+    llm = get_llm().with_structured_output(_SCHEMAS[want_cv])
+    resume_content, job_description = trim_prompt_inputs(resume_content, job_description)
+
+    formatted_prompt = _PROMPTS[want_cv].format(
+        resume=resume_content,
+        job_description=job_description,
+        company_name=company_name,
+        tone=tone
+    )
+
+    try:
+        content = llm.invoke(formatted_prompt)
+    except (OutputParserException, ValidationError) as e:
+        print(f"Error parsing AI response: {e}")
+        content = None
+
+    objective = content.objective.strip() if content else ""
+    if not objective:
+        objective = "A highly motivated professional with relevant experience."
+
+    filename = clean_text_for_filename(f"{content.role}-at-{content.company}") if content else ""
+    if not filename:
+        filename = "resume-generated"
+
+    cover_letter = None
+    if want_cv:
+        cover_letter = content.cover_letter.strip() if content else ""
+        if not cover_letter:
+            # Fall back to a dedicated request rather than returning no letter
+            cover_letter = generate_cover_letter(
+                resume_content=resume_content,
+                job_description=job_description,
+                company_name=company_name,
+                tone=tone
+            )
+
+    if content is None:
+        # Don't cache the fallback, so a retry asks the model again
+        raise Uncached((objective, filename, cover_letter))
+    return objective, filename, cover_letter
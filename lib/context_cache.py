@@ -0,0 +1,113 @@
+import asyncio
+import atexit
+import hashlib
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+from langchain_core.messages import HumanMessage
+from langchain_google_vertexai import ChatVertexAI
+from langchain_google_vertexai.utils import create_context_cache
+from lib.llm import get_llm
+
+# Set VERTEX_CONTEXT_CACHE=true to upload each prompt's static part (the
+# instructions and the resume) once as Vertex AI cached content; later
+# requests then only send the per-job part and are billed the cached rate
+CONTEXT_CACHE_ENABLED = os.getenv("VERTEX_CONTEXT_CACHE", "false").lower() in ("1", "true", "yes")
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("VERTEX_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+
+# Stop using a cache this long before Vertex AI expires it
+_EXPIRY_MARGIN_SECONDS = 60
+
+# Prefix hash -> (cache name or None, expiry as time.monotonic())
+_caches = {}
+# Prefix hash -> lock held while that prefix's cache is created, so only
+# requests for the same prefix wait on each other
+_creation_locks = {}
+_creation_locks_lock = threading.Lock()
+
+def _prefix_key(prefix: str) -> str:
+    return hashlib.blake2b(prefix.encode('utf-8'), digest_size=16).hexdigest()
+
+def _live_entry(key: str) -> Optional[tuple[Optional[str], float]]:
+    entry = _caches.get(key)
+    return entry if entry is not None and entry[1] > time.monotonic() else None
+
+def get_context_cache(prefix: str) -> Optional[str]:
+    """
+    Get the name of a Vertex AI context cache holding prefix, creating it if needed.
+
+    Creation failures (e.g. a prefix below the model's minimum cacheable
+    size) are remembered for the TTL as well, so they aren't retried on
+    every request.
+
+    Args:
+        prefix: The static part of the prompt
+
+    Returns:
+        The cached content's resource name, or None if it could not be created
+    """
+    key = _prefix_key(prefix)
+    with _creation_locks_lock:
+        lock = _creation_locks.setdefault(key, threading.Lock())
+    with lock:
+        entry = _live_entry(key)
+        if entry is not None:
+            return entry[0]
+
+        try:
+            name = create_context_cache(
+                get_llm(),
+                [HumanMessage(content=prefix)],
+                time_to_live=timedelta(seconds=CONTEXT_CACHE_TTL_SECONDS),
+            )
+        except Exception as e:
+            print(f"Error creating context cache: {e}")
+            name = None
+        _caches[key] = (name, time.monotonic() + CONTEXT_CACHE_TTL_SECONDS - _EXPIRY_MARGIN_SECONDS)
+        return name
+
+def prepare_prompt(prefix: str, suffix: str) -> tuple[ChatVertexAI, str]:
+    """
+    Pick the client and prompt text for a prompt split into a static and a per-job part.
+
+    Args:
+        prefix: The static part of the prompt
+        suffix: The per-job part of the prompt
+
+    Returns:
+        Tuple of (llm, prompt); with VERTEX_CONTEXT_CACHE set, llm reads the
+        prefix from a context cache and prompt is only the suffix, otherwise
+        llm is the shared client and prompt is the whole text
+    """
+    if CONTEXT_CACHE_ENABLED:
+        name = get_context_cache(prefix)
+        if name is not None:
+            return get_llm(cached_content=name), suffix
+    return get_llm(), prefix + suffix
+
+async def aprepare_prompt(prefix: str, suffix: str) -> tuple[ChatVertexAI, str]:
+    """
+    Async variant of prepare_prompt; a cache that still has to be created is
+    created in a thread, so the event loop keeps serving other requests.
+    """
+    if CONTEXT_CACHE_ENABLED:
+        entry = _live_entry(_prefix_key(prefix))
+        name = entry[0] if entry is not None else await asyncio.to_thread(get_context_cache, prefix)
+        if name is not None:
+            return get_llm(cached_content=name), suffix
+    return get_llm(), prefix + suffix
+
+@atexit.register
+def _delete_context_caches() -> None:
+    # Caches expire on their own; deleting them on exit just stops the storage billing early
+    names = [name for name, _ in _caches.values() if name is not None]
+    if not names:
+        return
+    from vertexai.preview.caching import CachedContent
+    for name in names:
+        try:
+            CachedContent(cached_content_name=name).delete()
+        except Exception as e:
+            print(f"Error deleting context cache {name}: {e}")
@@ -1,13 +1,48 @@
-from typing import Optional
-from langchain_google_vertexai import ChatVertexAI
+from typing import Callable, Optional
 from langchain.prompts import PromptTemplate
 from pathlib import Path
+from lib.batcher import prompt_batcher
+from lib.cache import disk_cached, memory_cached
+from lib.context_cache import aprepare_prompt, prepare_prompt
+from lib.llm import astream_text, atrim_prompt_inputs, stream_text, trim_prompt_inputs
 
+# Built once at import; only the inputs change between calls. Static text
+# comes first and the job description last, so requests share the longest
+# possible prefix for Gemini's implicit (or explicit) context caching
+_PREFIX = PromptTemplate.from_template("""
+    Write a cover letter for a job application.
+    Use the resume and job description below to create a personalized cover letter.
+    
+    Note:
+
+    1. Make sure to provide the cover letter in the format of a professional cover letter.
+    2. Do not use any formatting. Use plain text
+    3. Include a subject for the cover letter.
+    4. Make it short and to the point.
+    5. Make it under 2-3 paragraph max. But try to keep it under 2 paragraph.
+    6. Most of the time try to use the resume content to generate the cover letter.
+    7. Do not include any skills or experiences that is not included in the resume.
+    8. Do not include any skills or experiences that is not included in the job description.
+    9. Try to make the 2nd paragraph in bullet points that are related to the job description and why I am a good fit for the job.
+    
+    Resume:
+    {resume}
+    """)
+_SUFFIX = PromptTemplate.from_template("""
+    Write the cover letter in a {tone} tone, for a job application at {company_name}.
+    
+    Job Description:
+    {job_description}
+    """)
+
+@memory_cached()
+@disk_cached
 def generate_cover_letter(
     resume_content: str,
     job_description: str,
     company_name: str = "the company",
-    tone: str = "professional"
+    tone: str = "professional",
+    on_chunk: Optional[Callable[[str], None]] = None
 ) -> str:
     """
     Generate a tailored cover letter based on resume and job description.
@@ -17,45 +52,46 @@ def generate_cover_letter(
         job_description: The job description
         company_name: Name of the company (for personalization)
         tone: Tone of the cover letter ('professional', 'enthusiastic', 'formal')
+        on_chunk: Optional callback receiving the letter text as it streams in
         
     Returns:
         Generated cover letter text
     """
-    llm = ChatVertexAI(model="gemini-2.5-flash", temperature=0.7)
-    
-    prompt_template = """
-    Write a {tone} cover letter for a job application at {company_name}.
-    Use the following resume and job description to create a personalized cover letter.
-    
-    Resume:
-    {resume}
-    
-    Job Description:
-    {job_description}
-    
-    Note:
+    llm, formatted_prompt = prepare_prompt(*_build_prompt(*trim_prompt_inputs(resume_content, job_description), company_name, tone))
+    return stream_text(llm, formatted_prompt, on_chunk).strip()
 
-    1. Make sure to provide the cover letter in the format of a professional cover letter.
-    2. Do not use any formatting. Use plain text
-    3. Include a subject for the cover letter.
-    4. Make it short and to the point.
-    5. Make it under 2-3 paragraph max. But try to keep it under 2 paragraph.
-    6. Most of the time try to use the resume content to generate the cover letter.
-    7. Do not include any skills or experiences that is not included in the resume.
-    8. Do not include any skills or experiences that is not included in the job description.
-    9. Try to make the 2nd paragraph in bullet points that are related to the job description and why I am a good fit for the job.
+@memory_cached()
+@disk_cached
+async def generate_cover_letter_async(
+    resume_content: str,
+    job_description: str,
+    company_name: str = "the company",
+    tone: str = "professional",
+    on_chunk: Optional[Callable[[str], None]] = None
+) -> str:
     """
+    Async variant of generate_cover_letter, for running alongside other LLM calls.
+    
+    Without on_chunk the prompt goes through the shared prompt batcher, so
+    concurrent requests are sent to Vertex AI together.
     
-    prompt = PromptTemplate.from_template(prompt_template)
-    formatted_prompt = prompt.format(
-        resume=resume_content,
+    Returns:
+        Generated cover letter text
+    """
+    prefix, suffix = _build_prompt(*await atrim_prompt_inputs(resume_content, job_description), company_name, tone)
+    if on_chunk is None:
+        return (await prompt_batcher.submit(prefix + suffix)).strip()
+    llm, formatted_prompt = await aprepare_prompt(prefix, suffix)
+    return (await astream_text(llm, formatted_prompt, on_chunk)).strip()
+
+def _build_prompt(resume_content: str, job_description: str, company_name: str, tone: str) -> tuple[str, str]:
+    # Returns the static (instructions + resume) and per-job parts of the
+    # prompt; the inputs are already trimmed by (a)trim_prompt_inputs
+    return _PREFIX.format(resume=resume_content), _SUFFIX.format(
         job_description=job_description,
         company_name=company_name,
         tone=tone
     )
-    
-    response = llm.invoke(formatted_prompt)
-    return response.content.strip()
 
 def save_cover_letter(content: str, output_path: str) -> str:
     """
@@ -0,0 +1,153 @@
+import contextlib
+import functools
+import io
+import os
+from typing import Callable, Optional
+from langchain_google_vertexai import ChatVertexAI
+from lib.resume_sections import RESUME_TOP_SECTIONS, aselect_resume_sections, select_resume_sections
+from utils import squeeze_blank_lines, token_trim
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+DEFAULT_TEMPERATURE = 0.7
+# Vertex AI region, e.g. us-central1; unset uses the SDK's default
+DEFAULT_LOCATION = os.getenv("VERTEX_LOCATION")
+
+# Prompt input budgets; prefill time grows with the number of input tokens
+MAX_RESUME_TOKENS = 2000
+MAX_JOB_DESCRIPTION_TOKENS = 1000
+
+
+@functools.lru_cache(maxsize=8)
+def get_llm(
+    model: str = DEFAULT_MODEL,
+    temperature: float = DEFAULT_TEMPERATURE,
+    location: Optional[str] = DEFAULT_LOCATION,
+    cached_content: Optional[str] = None
+) -> ChatVertexAI:
+    """
+    Get a shared ChatVertexAI client for the given model, temperature and region.
+
+    The client is created on first use and reused afterwards, so the auth and
+    channel setup cost is only paid once per process.
+
+    Args:
+        model: Name of the Vertex AI model
+        temperature: Sampling temperature
+        location: Vertex AI region; None uses the SDK's default
+        cached_content: Resource name of a Vertex AI context cache to prepend to every prompt
+
+    Returns:
+        A cached ChatVertexAI instance
+    """
+    kwargs = {}
+    if location is not None:
+        kwargs['location'] = location
+    if cached_content is not None:
+        kwargs['cached_content'] = cached_content
+    return ChatVertexAI(model=model, temperature=temperature, **kwargs)
+
+
+def stream_text(
+    llm: ChatVertexAI,
+    prompt: str,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    until: Optional[Callable[[str], bool]] = None
+) -> str:
+    """
+    Stream a completion, passing each chunk to on_chunk as it arrives.
+
+    Args:
+        llm: The chat model to call
+        prompt: The formatted prompt
+        on_chunk: Optional callback receiving each text chunk
+        until: Optional predicate on the text so far; once it returns True
+            the stream is closed, which stops the model generating the rest
+
+    Returns:
+        The full response text
+    """
+    buffer = io.StringIO()
+    # Closed explicitly, so stopping early ends the request right away
+    with contextlib.closing(llm.stream(prompt)) as stream:
+        for chunk in stream:
+            text = chunk.content
+            if not text:
+                continue
+            buffer.write(text)
+            if on_chunk is not None:
+                on_chunk(text)
+            if until is not None and until(buffer.getvalue()):
+                break
+    return buffer.getvalue()
+
+
+async def astream_text(
+    llm: ChatVertexAI,
+    prompt: str,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    until: Optional[Callable[[str], bool]] = None
+) -> str:
+    """
+    Async variant of stream_text.
+
+    Args:
+        llm: The chat model to call
+        prompt: The formatted prompt
+        on_chunk: Optional callback receiving each text chunk
+        until: Optional predicate on the text so far; once it returns True
+            the stream is closed, which stops the model generating the rest
+
+    Returns:
+        The full response text
+    """
+    buffer = io.StringIO()
+    # Closed explicitly, so stopping early ends the request right away
+    async with contextlib.aclosing(llm.astream(prompt)) as stream:
+        async for chunk in stream:
+            text = chunk.content
+            if not text:
+                continue
+            buffer.write(text)
+            if on_chunk is not None:
+                on_chunk(text)
+            if until is not None and until(buffer.getvalue()):
+                break
+    return buffer.getvalue()
+
+
+def reset_llm_clients() -> None:
+    """Drop cached clients so a forked worker process builds its own on first use."""
+    get_llm.cache_clear()
+
+
+def trim_prompt_inputs(resume_content: str, job_description: str) -> tuple[str, str]:
+    """
+    Bound the resume and job description to their token budgets.
+
+    Args:
+        resume_content: The content of the resume
+        job_description: The job description
+
+    Returns:
+        Tuple of (resume_content, job_description) with blank-line runs
+        collapsed and each trimmed to its token budget; with
+        RESUME_TOP_SECTIONS set, the resume is first reduced to the
+        sections most relevant to the job description
+    """
+    if RESUME_TOP_SECTIONS:
+        resume_content = select_resume_sections(resume_content, job_description)
+    return _trim_to_budgets(resume_content, job_description)
+
+
+async def atrim_prompt_inputs(resume_content: str, job_description: str) -> tuple[str, str]:
+    """Async variant of trim_prompt_inputs, for use on the event loop."""
+    if RESUME_TOP_SECTIONS:
+        resume_content = await aselect_resume_sections(resume_content, job_description)
+    return _trim_to_budgets(resume_content, job_description)
+
+
+def _trim_to_budgets(resume_content: str, job_description: str) -> tuple[str, str]:
+    return (
+        token_trim(squeeze_blank_lines(resume_content), MAX_RESUME_TOKENS),
+        token_trim(squeeze_blank_lines(job_description), MAX_JOB_DESCRIPTION_TOKENS),
+    )
@@ -0,0 +1,177 @@
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from langchain.prompts import PromptTemplate
+from lib.llm import get_llm, trim_prompt_inputs
+from lib.objective_generator import generate_career_objective
+from utils import clean_text_for_filename
+
+_ITEM_SECTION_RE = re.compile(
+    r'^[ \t]*(OBJECTIVE|FILENAME)_(\d+):[ \t]*(.*?)(?=^[ \t]*(?:OBJECTIVE|FILENAME)_\d+:|\Z)',
+    re.MULTILINE | re.DOTALL
+)
+
+_BATCH_PROMPT = PromptTemplate.from_template("""
+    For every numbered item below, generate a career objective that is 2-3 sentences in length, written in the tone given for that item. The objective should highlight the most relevant skills and experiences from the resume that match the item's job requirements. Also generate a suggested filename based on the item's job description that includes the job role and company name in the format: [role]-at-[company].
+
+    {items}
+
+    Output Format (repeat for every item, using its number):
+
+    OBJECTIVE_1:
+    [Career objective for item 1]
+
+    FILENAME_1:
+    [suggested-filename for item 1]
+    """)
+
+def generate_career_objectives_batch(
+    requests: list[tuple[str, str, str]]
+) -> list[tuple[str, str]]:
+    """
+    Generate career objectives for several applications with one LLM call.
+
+    Args:
+        requests: List of (resume_content, job_description, tone) tuples
+
+    Returns:
+        List of (objective, filename) tuples in the same order as requests
+    """
+    trimmed = [(*trim_prompt_inputs(resume, job_description), tone) for resume, job_description, tone in requests]
+
+    # Applications almost always share one resume; send it only once
+    shared_resume = trimmed[0][0] if all(resume == trimmed[0][0] for resume, _, _ in trimmed) else None
+    blocks = [f"Resume (applies to every item):\n{shared_resume}"] if shared_resume is not None else []
+    for number, (resume, job_description, tone) in enumerate(trimmed, start=1):
+        block = f"### ITEM {number} ###\nTone: {tone}\n"
+        if shared_resume is None:
+            block += f"Resume:\n{resume}\n"
+        blocks.append(block + f"Job Description:\n{job_description}")
+
+    response = get_llm().invoke(_BATCH_PROMPT.format(items="\n\n".join(blocks)))
+
+    sections = {}
+    for label, number, text in _ITEM_SECTION_RE.findall(response.content):
+        sections.setdefault((label, int(number)), text.strip())
+
+    results = []
+    for number, (resume, job_description, tone) in enumerate(requests, start=1):
+        objective = sections.get(('OBJECTIVE', number))
+        filename = clean_text_for_filename(sections.get(('FILENAME', number), ''))
+        if objective and filename:
+            results.append((objective, filename))
+            # Store it as if generate_career_objective had made it, so later requests reuse it
+            generate_career_objective.cache_set(
+                (objective, filename),
+                resume_content=resume,
+                job_description=job_description,
+                tone=tone
+            )
+        else:
+            # Item missing from the batched answer; ask for it on its own
+            results.append(generate_career_objective(
+                resume_content=resume,
+                job_description=job_description,
+                tone=tone
+            ))
+    return results
+
+class BatchedObjectiveGenerator:
+    """
+    Coalesce concurrent objective requests into a single Vertex AI call.
+
+    Requests submitted from different threads (e.g. a threaded Celery worker)
+    within max_wait_seconds of each other, up to max_batch_size of them, are
+    row-marshaled into one prompt, and batches are sent concurrently.
+    Requests already in the objective cache (up to an exact match of the
+    semantic layer) are answered without being queued, and batched results
+    are stored in it. A lone request is sent with the regular single-item
+    prompt.
+    """
+
+    def __init__(self, max_batch_size: int = 4, max_wait_seconds: float = 0.2):
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, resume_content: str, job_description: str, tone: str = 'professional') -> Future:
+        """
+        Queue an objective request.
+
+        Returns:
+            A future resolving to (objective, filename)
+        """
+        future = Future()
+        try:
+            cached = generate_career_objective.cache_get(
+                resume_content=resume_content,
+                job_description=job_description,
+                tone=tone
+            )
+            if cached is not None:
+                future.set_result(cached)
+            elif self.max_batch_size <= 1:
+                future.set_result(generate_career_objective(
+                    resume_content=resume_content,
+                    job_description=job_description,
+                    tone=tone
+                ))
+            else:
+                self._ensure_worker()
+                self._queue.put(((resume_content, job_description, tone), future))
+        except Exception as e:
+            # Reported through the future, like failures of queued requests
+            future.set_exception(e)
+        return future
+
+    def _ensure_worker(self) -> None:
+        # Started lazily so forked worker processes each get their own thread
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="objective-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Each batch gets its own thread, so a slow Vertex call doesn't
+            # hold up the batches collected after it
+            threading.Thread(target=self._process, args=(batch,), name="objective-batch", daemon=True).start()
+
+    def _process(self, batch: list[tuple[tuple[str, str, str], Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                (resume_content, job_description, tone), _ = batch[0]
+                results = [generate_career_objective(
+                    resume_content=resume_content,
+                    job_description=job_description,
+                    tone=tone
+                )]
+            else:
+                results = generate_career_objectives_batch([request for request, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+objective_batcher = BatchedObjectiveGenerator(
+    max_batch_size=int(os.getenv("OBJECTIVE_BATCH_SIZE", "4")),
+    max_wait_seconds=int(os.getenv("OBJECTIVE_BATCH_WAIT_MS", "200")) / 1000
+)
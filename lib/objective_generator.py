@@ -1,16 +1,60 @@
-from typing import Optional
-from langchain_google_vertexai import ChatVertexAI
+from typing import Callable, Optional
 from langchain.prompts import PromptTemplate
 import re
+from lib.batcher import prompt_batcher
+from lib.cache import Uncached, disk_cached, memory_cached, returns_uncached
+from lib.context_cache import aprepare_prompt, prepare_prompt
+from lib.llm import astream_text, atrim_prompt_inputs, stream_text, trim_prompt_inputs
+from lib.semantic_cache import semantic_cached
 from utils import clean_text_for_filename
 
+_SECTION_RE = re.compile(r'(CAREER OBJECTIVE|FILENAME):(.*?)(?=CAREER OBJECTIVE:|FILENAME:|\Z)', re.DOTALL)
+# The filename comes last, so once its line is finished (after a non-empty
+# objective) the rest of the response is not needed
+_FILENAME_LINE_RE = re.compile(r'CAREER OBJECTIVE:\s*\S.*?FILENAME:\s*\S[^\n]*\n', re.DOTALL)
+
+# Built once at import; only the inputs change between calls. Static text
+# comes first and the job description last, so requests share the longest
+# possible prefix for Gemini's implicit (or explicit) context caching
+_PREFIX = PromptTemplate.from_template("""
+    Based on the resume and job description below, generate a career objective. The objective should highlight the most relevant skills and experiences from the resume that match the job requirements. Also generate a suggested filename based on the job description that includes the job role and company name in the format: [role]-at-[company].
+    
+    Output Format:
+
+    CAREER OBJECTIVE:
+    [Your career objective here]
+    
+    FILENAME:
+    [suggested-filename]
+    
+    Resume:
+    {resume}
+    """)
+_SUFFIX = PromptTemplate.from_template("""
+    Write the objective in a {tone} tone, {length} in length.
+    
+    Job Description:
+    {job_description}
+    """)
+
+# Map length to descriptive terms
+_LENGTH_MAP = {
+    'short': '2-3 sentences',
+    'medium': '3-4 sentences',
+    'long': '4-5 sentences'
+}
+
+@returns_uncached
+@memory_cached()
+@disk_cached
+@semantic_cached('job_description')
 def generate_career_objective(
     resume_content: str,
     job_description: str,
     objective_length: str = 'short',
     tone: str = 'professional',
-
-) -> str:
+    on_chunk: Optional[Callable[[str], None]] = None
+) -> tuple[str, str]:
     """
     Generate a tailored career objective based on resume and job description.
     
@@ -19,61 +63,70 @@ def generate_career_objective(
         job_description: The job description to tailor the objective to
         objective_length: Length of the objective ('short', 'medium', or 'long')
         tone: Tone of the objective ('professional', 'enthusiastic', 'formal')
+        on_chunk: Optional callback receiving the raw response as it streams in
         
     Returns:
-        Generated career objective string
+        Tuple of (career objective, suggested filename)
     """
-    # Initialize the language model
-    llm = ChatVertexAI(model="gemini-2.5-flash", temperature=0.7)
-    
-    # Define the prompt template
-    prompt_template = """
-    Based on the following resume and job description, generate a {tone} career objective that is {length} in length. The objective should highlight the most relevant skills and experiences from the resume that match the job requirements. Also generate a suggested filename based on the job description that includes the job role and company name in the format: [role]-at-[company].
-    
-    Resume:
-    {resume}
+    llm, formatted_prompt = prepare_prompt(*_build_prompt(*trim_prompt_inputs(resume_content, job_description), objective_length, tone))
     
-    Job Description:
-    {job_description}
-    
-    Output Format:
+    # Generate the objective
+    response_text = stream_text(llm, formatted_prompt, on_chunk, until=_has_filename_line)
+    return _parse_response(response_text)
 
-    CAREER OBJECTIVE:
-    [Your career objective here]
-    
-    FILENAME:
-    [suggested-filename]
+@returns_uncached
+@memory_cached()
+@disk_cached
+@semantic_cached('job_description')
+async def generate_career_objective_async(
+    resume_content: str,
+    job_description: str,
+    objective_length: str = 'short',
+    tone: str = 'professional',
+    on_chunk: Optional[Callable[[str], None]] = None
+) -> tuple[str, str]:
     """
+    Async variant of generate_career_objective, for running alongside other LLM calls.
     
-    # Map length to descriptive terms
-    length_map = {
-        'short': '2-3 sentences',
-        'medium': '3-4 sentences',
-        'long': '4-5 sentences'
-    }
+    Without on_chunk the prompt goes through the shared prompt batcher, so
+    concurrent requests are sent to Vertex AI together.
     
-    # Format the prompt
-    prompt = PromptTemplate.from_template(prompt_template)
-    formatted_prompt = prompt.format(
-        resume=resume_content,
+    Returns:
+        Tuple of (career objective, suggested filename)
+    """
+    prefix, suffix = _build_prompt(*await atrim_prompt_inputs(resume_content, job_description), objective_length, tone)
+    if on_chunk is None:
+        response_text = await prompt_batcher.submit(prefix + suffix)
+    else:
+        llm, formatted_prompt = await aprepare_prompt(prefix, suffix)
+        response_text = await astream_text(llm, formatted_prompt, on_chunk, until=_has_filename_line)
+    return _parse_response(response_text)
+
+def _build_prompt(resume_content: str, job_description: str, objective_length: str, tone: str) -> tuple[str, str]:
+    # Returns the static (instructions + resume) and per-job parts of the
+    # prompt; the inputs are already trimmed by (a)trim_prompt_inputs
+    return _PREFIX.format(resume=resume_content), _SUFFIX.format(
         job_description=job_description,
         tone=tone,
-        length=length_map.get(objective_length.lower(), '3-4 sentences')
+        length=_LENGTH_MAP.get(objective_length.lower(), '3-4 sentences')
     )
-    
-    # Generate the objective
-    response = llm.invoke(formatted_prompt)
-    
+
+def _has_filename_line(response_text: str) -> bool:
+    return _FILENAME_LINE_RE.search(response_text) is not None
+
+def _parse_response(response_text: str) -> tuple[str, str]:
     # Parse the response
     try:
-        objective = re.search(r'CAREER OBJECTIVE:(.*?)(?=FILENAME:|$)', response.content, re.DOTALL)
-        filename = re.search(r'FILENAME:(.*?)$', response.content, re.DOTALL)
+        # Walk the response once, keeping the first occurrence of each label
+        sections = {}
+        for match in _SECTION_RE.finditer(response_text):
+            sections.setdefault(match.group(1), match.group(2))
         
-        if not objective or not filename:
+        if 'CAREER OBJECTIVE' not in sections or 'FILENAME' not in sections:
             raise ValueError("Could not parse AI response")
         
-        objective = objective.group(1).strip()
-        filename = filename.group(1).strip()
+        objective = sections['CAREER OBJECTIVE'].strip()
+        filename = sections['FILENAME'].strip()
         
         # Clean and validate the filename
         filename = clean_text_for_filename(filename)
@@ -84,5 +137,5 @@ def generate_career_objective(
         
     except Exception as e:
         print(f"Error parsing AI response: {e}")
-        # Fallback to a default filename if parsing fails
-        return "A highly motivated professional with relevant experience.", "resume-generated"
\ No newline at end of file
+        # Fallback to a default filename if parsing fails; not cached, so a retry asks again
+        raise Uncached(("A highly motivated professional with relevant experience.", "resume-generated"))
\ No newline at end of file
@@ -1,19 +1,109 @@
+import copy
+import functools
+import io
+import os
+import zipfile
 from pathlib import Path
-from typing import Optional
-from docx import Document
+from typing import NamedTuple, Optional
+from xml.sax.saxutils import escape
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
 from docx.shared import Pt
+from docx.text.paragraph import Paragraph
+from utils import read_bytes_cached, write_file_atomic
+from utils.pdf_utils import convert_to_pdf
+
+_DOCUMENT_PART = 'word/document.xml'
+_DEFAULT_PLACEHOLDER = '<objective_here>'
+
+_PARAGRAPH_TAG = qn('w:p')
+_TEXT_TAG = qn('w:t')
+
+class TemplateParts(NamedTuple):
+    """A resume template pre-split around its objective placeholder."""
+    base_zip: bytes
+    document_info: zipfile.ZipInfo
+    prefix: Optional[bytes]
+    suffix: Optional[bytes]
+    # Parsed word/document.xml, only kept when the placeholder can't be spliced
+    document_root: Optional[object] = None
+    # Position of the placeholder paragraph among the body's children
+    paragraph_index: Optional[int] = None
+
+def load_template(source_path: str, placeholder: str = _DEFAULT_PLACEHOLDER) -> TemplateParts:
+    """
+    Analyse a DOCX template once so each update only has to splice in text.
+    
+    The result is cached per (path, mtime, placeholder), so calling this at
+    worker start warms the cache for every later update_resume_objective call.
+    
+    Args:
+        source_path: Path to the DOCX template
+        placeholder: The placeholder text to locate
+        
+    Returns:
+        The template parts; prefix and suffix are None when the placeholder is
+        not stored as one contiguous run in word/document.xml, in which case
+        document_root holds the parsed document part and paragraph_index the
+        placeholder paragraph (None if there is none)
+    """
+    return _load_template_parts(source_path, os.stat(source_path).st_mtime_ns, placeholder)
+
+@functools.lru_cache(maxsize=4)
+def _load_template_parts(source_path: str, mtime_ns: int, placeholder: str) -> TemplateParts:
+    # Every entry except word/document.xml is compressed once into base_zip;
+    # updates append the patched document part to a copy of it
+    base_buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(read_bytes_cached(source_path))) as source_zip, \
+            zipfile.ZipFile(base_buffer, 'w', zipfile.ZIP_DEFLATED) as base_zip:
+        for info in source_zip.infolist():
+            if info.filename == _DOCUMENT_PART:
+                document_info = info
+                document_xml = source_zip.read(info)
+            else:
+                base_zip.writestr(info, source_zip.read(info))
+
+    prefix, found, suffix = document_xml.partition(escape(placeholder).encode('utf-8'))
+    if not found:
+        root = parse_xml(document_xml)
+        paragraph_index = _find_placeholder_paragraph(root.body, placeholder)
+        return TemplateParts(base_buffer.getvalue(), document_info, None, None, root, paragraph_index)
+    return TemplateParts(base_buffer.getvalue(), document_info, prefix, suffix)
+
+def _find_placeholder_paragraph(body, placeholder: str) -> Optional[int]:
+    # Join each body paragraph's w:t nodes once, so a placeholder split across
+    # runs is found while field codes and deleted text are ignored
+    for index, child in enumerate(body):
+        if child.tag == _PARAGRAPH_TAG and placeholder in ''.join(child.itertext(_TEXT_TAG, with_tail=False)):
+            return index
+    return None
+
+def _write_package(template: TemplateParts, document_xml: bytes, output_path: str) -> None:
+    buffer = io.BytesIO(template.base_zip)
+    with zipfile.ZipFile(buffer, 'a', zipfile.ZIP_DEFLATED) as output_zip:
+        # writestr fills in sizes and offsets, so don't touch the cached info
+        output_zip.writestr(copy.copy(template.document_info), document_xml)
+    write_file_atomic(output_path, buffer.getvalue())
 
 def update_resume_objective(
     source_path: str,
     output_path: str,
     new_objective: str,
-    placeholder: str = '<objective_here>',
+    placeholder: str = _DEFAULT_PLACEHOLDER,
     font_name: str = 'Spectral',
     font_size: int = 10
 ) -> str:
     """
     Update the objective section in a DOCX file.
     
+    When the placeholder sits in a single run, the new text is spliced into
+    the pre-split word/document.xml from load_template and appended to the
+    pre-compressed rest of the package, so the run keeps the formatting it
+    has in the template. Otherwise a copy of the cached, parsed document
+    part is edited with python-docx, which applies font_name and font_size
+    to the new run, and appended the same way.
+    
     Args:
         source_path: Path to the source DOCX file
         output_path: Path where to save the updated file
@@ -28,26 +118,31 @@ def update_resume_objective(
     Raises:
         ValueError: If the placeholder is not found in the document
     """
-    doc = Document(source_path)
-    found_placeholder = False
-        
-    # Search through all paragraphs in the document
-    for paragraph in doc.paragraphs:
-        if placeholder in paragraph.text:
-            # Clear the paragraph and add a new run with the new objective
-            paragraph.clear()
-            run = paragraph.add_run(new_objective)
-            font = run.font
-            font.name = font_name
-            font.size = Pt(font_size)
-            found_placeholder = True
-            break
-    
-    if not found_placeholder:
+    template = load_template(source_path, placeholder)
+    if template.prefix is not None:
+        _write_package(
+            template,
+            template.prefix + escape(new_objective).encode('utf-8') + template.suffix,
+            output_path
+        )
+        return output_path
+
+    if template.paragraph_index is None:
         raise ValueError(f"Placeholder text '{placeholder}' not found in the document")
     
-    # Save the updated document
-    doc.save(output_path)
+    # Work on a copy of the cached tree, going straight to the paragraph
+    # located when the template was loaded
+    root = copy.deepcopy(template.document_root)
+    paragraph = Paragraph(root.body[template.paragraph_index], None)
+    
+    # Clear the paragraph and add a new run with the new objective
+    paragraph.clear()
+    run = paragraph.add_run(new_objective)
+    font = run.font
+    font.name = font_name
+    font.size = Pt(font_size)
+    
+    _write_package(template, serialize_part_xml(root), output_path)
     return output_path
     
     # Save the updated document
@@ -57,7 +152,7 @@ def update_resume_objective(
 
 def create_pdf_from_docx(docx_path: str, output_dir: Optional[str] = None) -> str:
     """
-    Convert a DOCX file to PDF using LibreOffice.
+    Convert a DOCX file to PDF using LibreOffice (through unoserver when enabled).
     
     Args:
         docx_path: Path to the DOCX file
@@ -66,8 +161,6 @@ def create_pdf_from_docx(docx_path: str, output_dir: Optional[str] = None) -> st
     Returns:
         Path to the generated PDF file
     """
-    from utils.pdf_utils import convert_to_pdf_libreoffice
-    
     if output_dir is None:
         output_dir = str(Path(docx_path).parent)
 
@@ -78,5 +171,5 @@ def create_pdf_from_docx(docx_path: str, output_dir: Optional[str] = None) -> st
     
     pdf_path = Path(output_dir)
     pdf_name = f"{Path(docx_path).stem}.pdf"
-    convert_to_pdf_libreoffice(docx_path, str(pdf_path), pdf_name)
+    convert_to_pdf(docx_path, str(pdf_path), pdf_name)
     return str(pdf_path / pdf_name)
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import re
+from lib.cache import disk_cached, memory_cached
+from lib.semantic_cache import get_embeddings, normalize_vector
+
+# Set RESUME_TOP_SECTIONS (e.g. 3) to send only the resume sections most
+# similar to the job description, plus the opening section; 0 sends the
+# whole resume
+RESUME_TOP_SECTIONS = int(os.getenv("RESUME_TOP_SECTIONS", "0"))
+
+# Split in front of every markdown heading up to ###
+_HEADING_RE = re.compile(r'^(?=#{1,3} )', re.MULTILINE)
+
+def split_sections(resume_content: str) -> list[str]:
+    """Split a markdown resume into sections, each starting at its heading."""
+    return [section for section in _HEADING_RE.split(resume_content) if section.strip()]
+
+@memory_cached(maxsize=4)
+@disk_cached
+def _section_embeddings(resume_content: str) -> tuple[list[str], list[list[float]]]:
+    # The resume rarely changes, so its sections are only embedded once and
+    # kept in the LLM cache directory across restarts
+    sections = split_sections(resume_content)
+    vectors = get_embeddings().embed_documents(sections)
+    return sections, [normalize_vector(vector) for vector in vectors]
+
+def _keep_top_sections(sections: list[str], vectors: list[list[float]], query: list[float], top_k: int) -> str:
+    scores = [sum(a * b for a, b in zip(query, vector)) for vector in vectors[1:]]
+    keep = set(sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:top_k])
+    return "".join([sections[0], *(section for index, section in enumerate(sections[1:]) if index in keep)])
+
+def select_resume_sections(resume_content: str, job_description: str, top_k: int = RESUME_TOP_SECTIONS) -> str:
+    """
+    Keep the resume sections most relevant to a job description.
+    
+    The opening section (name, contact details, summary) is always kept and
+    the selected sections stay in their original order.
+    
+    Args:
+        resume_content: The markdown resume
+        job_description: The job description to rank sections against
+        top_k: Number of sections to keep besides the opening one
+        
+    Returns:
+        The reduced resume, or the full resume if it has no more than
+        top_k + 1 sections
+    """
+    sections, vectors = _section_embeddings(resume_content)
+    if len(sections) <= top_k + 1:
+        return resume_content
+
+    query = normalize_vector(get_embeddings().embed_query(job_description))
+    return _keep_top_sections(sections, vectors, query, top_k)
+
+async def aselect_resume_sections(resume_content: str, job_description: str, top_k: int = RESUME_TOP_SECTIONS) -> str:
+    """Async variant of select_resume_sections, which doesn't block the event loop on embedding requests."""
+    sections, vectors = await asyncio.to_thread(_section_embeddings, resume_content)
+    if len(sections) <= top_k + 1:
+        return resume_content
+
+    query = normalize_vector(await get_embeddings().aembed_query(job_description))
+    return _keep_top_sections(sections, vectors, query, top_k)
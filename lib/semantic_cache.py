@@ -0,0 +1,265 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from langchain_google_vertexai import VertexAIEmbeddings
+from lib.cache import CACHE_DIR, CACHE_TTL_SECONDS, _UNKEYED_ARGS, _cache_key
+from utils import write_file_atomic
+
+# Set SEMANTIC_CACHE_THRESHOLD (cosine similarity, e.g. 0.92) to reuse results
+# generated for a near-identical job description, such as a reposted job;
+# unset, the semantic cache is disabled
+SEMANTIC_CACHE_THRESHOLD = os.getenv("SEMANTIC_CACHE_THRESHOLD")
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "text-embedding-004")
+# Newest entries kept per scope (resume, tone, ...); older ones stop matching
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+
+@functools.lru_cache(maxsize=1)
+def get_embeddings() -> VertexAIEmbeddings:
+    """Get the shared embeddings client used for semantic cache lookups."""
+    return VertexAIEmbeddings(model_name=SEMANTIC_CACHE_MODEL)
+
+def normalize_vector(vector: list[float]) -> list[float]:
+    """Scale a vector to unit length, so dot products between normalized vectors are cosines."""
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+# Digits, punctuation and whitespace runs; reposts of a job mostly differ in these
+_SKELETON_STRIP_RE = re.compile(r'[\W\d_]+')
+
+def text_skeleton(text: str) -> str:
+    """Hash text with case, digits, punctuation and spacing ignored."""
+    skeleton = _SKELETON_STRIP_RE.sub(' ', text).lower().strip()
+    return hashlib.blake2b(skeleton.encode('utf-8'), digest_size=16).hexdigest()
+
+class SemanticCache:
+    """
+    Results keyed by a scope and matched by embedding similarity.
+
+    The scope is a hash of every argument except the compared text, so only
+    calls with the same resume, tone, etc. can match. Entries are also
+    indexed by the text's skeleton (see text_skeleton), which matches
+    reposts without an embedding request. Entries are appended to a JSONL
+    file; entries added by other processes are picked up on the next lookup.
+    Entries older than ttl_seconds are ignored, and only the newest
+    max_entries per scope are kept in memory, which bounds each lookup.
+    """
+
+    def __init__(self, path: Path, threshold: float, ttl_seconds: int = CACHE_TTL_SECONDS,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._skeletons = {}
+        self._offset = 0
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def lookup_skeleton(self, scope: str, skeleton: str):
+        """
+        Find the entry in scope with the same text skeleton.
+
+        Returns:
+            The stored result, or None if there is none
+        """
+        with self._lock:
+            self._read_new_entries()
+            entry = self._skeletons.get(scope, {}).get(skeleton)
+            if entry is None or entry[0] < time.time() - self.ttl_seconds:
+                return None
+            return entry[1]
+
+    def lookup(self, scope: str, embedding: list[float]):
+        """
+        Find the closest entry in scope.
+
+        Returns:
+            The stored result, or None if no entry reaches the threshold
+        """
+        with self._lock:
+            self._read_new_entries()
+            cutoff = time.time() - self.ttl_seconds
+            best_score, best_result = self.threshold, None
+            for created, vector, result in self._entries.get(scope, ()):
+                if created < cutoff:
+                    continue
+                # Vectors are stored normalized, so the dot product is the cosine
+                score = sum(a * b for a, b in zip(embedding, vector))
+                if score >= best_score:
+                    best_score, best_result = score, result
+            return best_result
+
+    def add(self, scope: str, skeleton: str, embedding: list[float], result) -> None:
+        """Store a result under its scope, text skeleton and embedding."""
+        created = time.time()
+        line = json.dumps({
+            "scope": scope, "skeleton": skeleton, "embedding": embedding, "result": result, "created": created
+        }) + "\n"
+        with self._lock:
+            self._read_new_entries()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                self._offset = f.tell()
+            self._remember(scope, skeleton, embedding, result, created)
+
+    def _read_new_entries(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                inode = os.fstat(f.fileno()).st_ino
+                if inode != self._inode:
+                    # First read, or sweep_semantic_cache replaced the file; start over
+                    self._entries.clear()
+                    self._skeletons.clear()
+                    self._offset = 0
+                    self._inode = inode
+                f.seek(self._offset)
+                cutoff = time.time() - self.ttl_seconds
+                for line in f:
+                    if not line.endswith("\n"):
+                        # Another process is still writing this entry
+                        break
+                    self._offset += len(line.encode('utf-8'))
+                    entry = json.loads(line)
+                    # Entries from before timestamps were stored count as expired
+                    created = entry.get("created", 0)
+                    if created >= cutoff:
+                        self._remember(entry["scope"], entry.get("skeleton"), entry["embedding"], entry["result"], created)
+        except FileNotFoundError:
+            pass
+
+    def _remember(self, scope: str, skeleton: str | None, embedding: list[float], result, created: float) -> None:
+        result = tuple(result) if isinstance(result, list) else result
+        entries = self._entries.get(scope)
+        if entries is None:
+            entries = self._entries[scope] = deque(maxlen=self.max_entries)
+        entries.append((created, embedding, result))
+        if skeleton is not None:
+            skeletons = self._skeletons.setdefault(scope, OrderedDict())
+            skeletons[skeleton] = (created, result)
+            skeletons.move_to_end(skeleton)
+            if len(skeletons) > self.max_entries:
+                skeletons.popitem(last=False)
+
+def sweep_semantic_cache(max_age_seconds: int = CACHE_TTL_SECONDS) -> int:
+    """
+    Drop semantic cache entries older than max_age_seconds.
+
+    Each semantic-*.jsonl file in CACHE_DIR is rewritten atomically without
+    its expired entries; processes holding it open reload it on their next
+    lookup.
+
+    Args:
+        max_age_seconds: Maximum age of an entry, based on when it was added
+
+    Returns:
+        Number of entries removed
+    """
+    if not CACHE_DIR.exists():
+        return 0
+
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in CACHE_DIR.glob("semantic-*.jsonl"):
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [line for line in f if line.endswith("\n")]
+        kept = [line for line in lines if json.loads(line).get("created", 0) >= cutoff]
+        if len(kept) < len(lines):
+            write_file_atomic(str(path), "".join(kept))
+            removed += len(lines) - len(kept)
+    return removed
+
+def semantic_cached(text_arg: str):
+    """
+    Reuse a generator's result for inputs whose text_arg is semantically close
+    to one seen before (see SEMANTIC_CACHE_THRESHOLD).
+
+    Returns the function unchanged when the semantic cache is disabled.
+    Works for both regular and async functions.
+    """
+    def decorator(func):
+        if not SEMANTIC_CACHE_THRESHOLD:
+            return func
+
+        cache = SemanticCache(CACHE_DIR / f"semantic-{func.__qualname__}.jsonl", float(SEMANTIC_CACHE_THRESHOLD))
+        skip = _UNKEYED_ARGS | {text_arg}
+
+        def text_of(args, kwargs) -> str:
+            return inspect.signature(func).bind(*args, **kwargs).arguments[text_arg]
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                scope = _cache_key(func, args, kwargs, skip)
+                text = text_of(args, kwargs)
+                skeleton = text_skeleton(text)
+                # The cache file is read and appended in a thread, off the event loop
+                result = await asyncio.to_thread(cache.lookup_skeleton, scope, skeleton)
+                if result is not None:
+                    return result
+
+                embedding = normalize_vector(await get_embeddings().aembed_query(text))
+                result = await asyncio.to_thread(cache.lookup, scope, embedding)
+                if result is None:
+                    result = await func(*args, **kwargs)
+                # Also on a similarity hit, so this exact skeleton skips the embedding next time
+                await asyncio.to_thread(cache.add, scope, skeleton, embedding, result)
+                return result
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                scope = _cache_key(func, args, kwargs, skip)
+                text = text_of(args, kwargs)
+                skeleton = text_skeleton(text)
+                result = cache.lookup_skeleton(scope, skeleton)
+                if result is not None:
+                    return result
+
+                embedding = normalize_vector(get_embeddings().embed_query(text))
+                result = cache.lookup(scope, embedding)
+                if result is None:
+                    result = func(*args, **kwargs)
+                # Also on a similarity hit, so this exact skeleton skips the embedding next time
+                cache.add(scope, skeleton, embedding, result)
+                return result
+
+        if inspect.iscoroutinefunction(func):
+            async def cache_get(*args, **kwargs):
+                scope = _cache_key(func, args, kwargs, skip)
+                return await asyncio.to_thread(cache.lookup_skeleton, scope, text_skeleton(text_of(args, kwargs)))
+
+            async def cache_set(result, *args, **kwargs):
+                text = text_of(args, kwargs)
+                embedding = normalize_vector(await get_embeddings().aembed_query(text))
+                await asyncio.to_thread(cache.add, _cache_key(func, args, kwargs, skip), text_skeleton(text), embedding, result)
+        else:
+            def cache_get(*args, **kwargs):
+                # Exact skeleton matches only: callers probe the cache before
+                # queueing work, so this must not wait on an embedding request
+                scope = _cache_key(func, args, kwargs, skip)
+                return cache.lookup_skeleton(scope, text_skeleton(text_of(args, kwargs)))
+
+            def cache_set(result, *args, **kwargs):
+                text = text_of(args, kwargs)
+                cache.add(
+                    _cache_key(func, args, kwargs, skip),
+                    text_skeleton(text),
+                    normalize_vector(get_embeddings().embed_query(text)),
+                    result
+                )
+
+        wrapper.cache_get = cache_get
+        wrapper.cache_set = cache_set
+        return wrapper
+
+    return decorator
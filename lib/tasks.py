@@ -1,65 +1,172 @@
 # tasks.py
 from celery_app import celery
+from celery import chain, group
+from celery.result import AsyncResult
+import os
 import uuid
 from pathlib import Path
-from lib.objective_generator import generate_career_objective
+from lib.cache import sweep_cache
+from lib.semantic_cache import sweep_semantic_cache
+from lib.combined_generator import generate_combined
+from lib.objective_batcher import objective_batcher
 from lib.pdf_utils import create_pdf_from_docx, update_resume_objective
-from lib.cover_letter_generator import generate_cover_letter
+from lib.cover_letter_generator import generate_cover_letter, save_cover_letter
 from utils.file_utils import get_resume_template
 
-@celery.task(bind=True)
-def process_application(
-    self,
-    resume_content: str,
-    job_description: str,
-    tone: str,
-    company_name: str | None = None,
-    generate_cv_flag: bool = False,
-):
-    """
-    Background job: generate objective, update resume, optional cover letter.
-    All serializers must work via JSON or pickle-safe objects.
-    """
-    # Ideally you move the logic from your synchronous route into here:
-    objective, file_name = generate_career_objective(
+# Set FUSE_LLM_CALLS=false to keep the objective and cover letter prompts
+# separate; they are then sent concurrently instead of in one request
+FUSE_LLM_CALLS = os.getenv("FUSE_LLM_CALLS", "true").lower() not in ("0", "false", "no")
+
+# Point OUTPUT_DIR at a RAM-backed filesystem (e.g. /dev/shm/generated) to keep
+# the DOCX/PDF round-trip off the disk; the API must see the same directory
+OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "generated"))
+
+# Every step passes a JSON-serializable dict on to the next one; the last
+# step's dict is the task result exposed through GET /queue/{task_id}
+
+@celery.task
+def gen_objective_task(resume_content: str, job_description: str, tone: str):
+    """Generate the career objective and a suggested filename."""
+    # Concurrent tasks in this worker share one Vertex AI call when possible
+    objective, file_name = objective_batcher.submit(
         resume_content=resume_content,
         job_description=job_description,
         tone=tone,
-    )
+    ).result()
+    print(objective)
+    print('-' * 50)
+    return {"objective": objective, "file_name": file_name}
 
+@celery.task
+def gen_combined_task(resume_content: str, job_description: str, tone: str, company_name: str | None = None):
+    """Generate objective, filename and cover letter in a single LLM call."""
+    objective, file_name, cover_letter = generate_combined(
+        resume_content=resume_content,
+        job_description=job_description,
+        company_name=company_name,
+        tone=tone,
+    )
     print(objective)
     print('-' * 50)
+    return {"objective": objective, "file_name": file_name, "cover_letter": cover_letter}
 
-    # Ensure unique filename
-    output_dir = Path("generated")
-    output_dir.mkdir(exist_ok=True)
-    if list(output_dir.glob(f"{file_name}.*")):
+@celery.task
+def gen_cover_letter_task(resume_content: str, job_description: str, tone: str, company_name: str | None = None):
+    """Generate the cover letter."""
+    cover_letter = generate_cover_letter(
+        resume_content=resume_content,
+        job_description=job_description,
+        company_name=company_name,
+        tone=tone,
+    )
+    return {"cover_letter": cover_letter}
+
+@celery.task
+def render_docx_task(state: dict):
+    """Write the objective into a copy of the resume template."""
+    state = dict(state)
+    file_name = state.pop("file_name")
+
+    # Ensure unique filename; OUTPUT_DIR is created when the worker starts
+    # Only these outputs are ever written, so check them directly instead of listing the directory
+    if any((OUTPUT_DIR / f"{file_name}{suffix}").exists() for suffix in (".docx", ".pdf", ".txt")):
         file_name = f"{file_name}_{uuid.uuid4().hex[:8]}"
 
     docx_path = update_resume_objective(
         source_path=get_resume_template(),
-        output_path=str(output_dir / f"{file_name}.docx"),
-        new_objective=objective,
+        output_path=str(OUTPUT_DIR / f"{file_name}.docx"),
+        new_objective=state["objective"],
     )
+    state["resume_docx"] = str(docx_path)
+    return state
+
+@celery.task
+def render_pdf_task(state: dict):
+    """Convert the generated resume to PDF."""
+    pdf_path = create_pdf_from_docx(state["resume_docx"], str(OUTPUT_DIR))
+    return {**state, "resume_pdf": pdf_path}
 
-    pdf_path = create_pdf_from_docx(docx_path, str(output_dir))
+@celery.task
+def collect_task(results: list[dict]):
+    """Merge the outputs of parallel branches into one result."""
+    merged = {}
+    for result in results:
+        merged.update(result)
+    return merged
 
-    result = {
-        "objective": objective,
-        "resume_docx": str(docx_path),
-        "resume_pdf": pdf_path,
-    }
+@celery.task
+def save_cv_task(state: dict):
+    """Save the cover letter next to the generated resume."""
+    if state.get("cover_letter") is None:
+        return state
+    letter_path = Path(state["resume_docx"]).with_suffix(".txt")
+    save_cover_letter(state["cover_letter"], str(letter_path))
+    return {**state, "cover_letter_path": str(letter_path)}
 
-    if generate_cv_flag:
-        cover_letter = generate_cover_letter(
-            resume_content=resume_content,
-            job_description=job_description,
-            company_name=company_name,
-            tone=tone,
+def build_application_workflow(
+    resume_content: str,
+    job_description: str,
+    tone: str,
+    company_name: str | None = None,
+    generate_cv_flag: bool = False,
+):
+    """
+    Build the Celery canvas that generates the objective, updates the resume,
+    renders the PDF and optionally writes a cover letter.
+
+    Splitting the job into small tasks keeps worker slots free for other jobs
+    between steps, and a failed PDF conversion retries without re-running the
+    LLM. The PDF conversion never waits on the cover letter: without a
+    fused prompt the letter is generated in parallel with the objective,
+    DOCX and PDF branch, and with one it is saved while the PDF renders.
+    """
+    llm_kwargs = dict(resume_content=resume_content, job_description=job_description, tone=tone)
+    resume_steps = [render_docx_task.s(), render_pdf_task.s()]
+
+    if not generate_cv_flag:
+        return chain(gen_objective_task.s(**llm_kwargs), *resume_steps)
+
+    if FUSE_LLM_CALLS:
+        # The letter is ready once the DOCX path is known; save it while the PDF renders
+        return chain(
+            gen_combined_task.s(company_name=company_name, **llm_kwargs),
+            render_docx_task.s(),
+            group(render_pdf_task.s(), save_cv_task.s()),
+            collect_task.s(),
         )
-        letter_path = output_dir / f"{file_name}.txt"
-        save_cover_letter(cover_letter, str(letter_path))
-        result["cover_letter"] = cover_letter
-        result["cover_letter_path"] = str(letter_path)
 
-    return result
+    return chain(
+        group(
+            chain(gen_objective_task.s(**llm_kwargs), *resume_steps),
+            gen_cover_letter_task.s(company_name=company_name, **llm_kwargs),
+        ),
+        collect_task.s(),
+        save_cv_task.s(),
+    )
+
+def enqueue_application(
+    resume_content: str,
+    job_description: str,
+    tone: str,
+    company_name: str | None = None,
+    generate_cv_flag: bool = False,
+) -> AsyncResult:
+    """
+    Background job: generate objective, update resume, optional cover letter.
+
+    Returns:
+        The AsyncResult of the workflow's final step, which holds the merged result
+    """
+    return build_application_workflow(
+        resume_content=resume_content,
+        job_description=job_description,
+        tone=tone,
+        company_name=company_name,
+        generate_cv_flag=generate_cv_flag,
+    ).apply_async()
+
+
+@celery.task
+def sweep_llm_cache():
+    """Periodic job: drop cached LLM outputs older than the configured TTL."""
+    return sweep_cache() + sweep_semantic_cache()
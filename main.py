@@ -7,25 +7,72 @@ career objectives, cover letters, and updating resumes.
 
 API Endpoints:
     GET / - Welcome message and available endpoints
+    POST /generate-objective/ - Generate a career objective
+    POST /generate-cover-letter/ - Generate a cover letter
+    POST /generate-objective/stream - Stream a career objective (server-sent events)
+    POST /generate-cover-letter/stream - Stream a cover letter (server-sent events)
     POST /queue/ - Process a job application (objective + resume update + optional cover letter)
+    GET /queue/{task_id} - Status and result of a queued job
+    GET /queue/{task_id}/pdf - Download the generated resume PDF
 """
+import asyncio
+import hashlib
+import orjson
+import os
+import time
 import uvicorn
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Optional
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 # Local imports
-from utils import read_file as read_file_util, ensure_directory
-from lib.tasks import process_application
+from utils import ensure_directory
+from utils.file_utils import get_resume_content
+from lib.cover_letter_generator import generate_cover_letter_async
+from lib.llm import get_llm
+from lib.objective_generator import generate_career_objective_async
+from lib.tasks import OUTPUT_DIR, enqueue_application
 from celery.result import AsyncResult
+from celery_app import celery
+
+# Longest the startup warm-up request may take; 0 skips it (it is a real, billed generation)
+LLM_WARMUP_TIMEOUT_SECONDS = float(os.getenv("LLM_WARMUP_TIMEOUT_SECONDS", "10"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up shared resources once per server process."""
+    # Create the shared Vertex AI client before the first request; the
+    # generators get this same instance from get_llm()
+    llm = get_llm()
+    if LLM_WARMUP_TIMEOUT_SECONDS > 0:
+        try:
+            # A tiny request fetches the auth token and opens the connection now
+            # rather than during the first user's request; bounded, so a slow or
+            # unreachable Vertex AI doesn't hold up startup
+            await asyncio.wait_for(llm.ainvoke("ping"), timeout=LLM_WARMUP_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"Vertex AI warm-up timed out after {LLM_WARMUP_TIMEOUT_SECONDS}s")
+        except Exception as e:
+            print(f"Vertex AI warm-up failed: {e}")
+
+    # Ensure required directories exist
+    ensure_directory(Path("input"))
+    ensure_directory(OUTPUT_DIR)
+    yield
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Resume AI API",
     description="API for generating tailored career objectives and cover letters",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson encodes the long objective/cover letter strings much faster than json
+    default_response_class=ORJSONResponse
 )
 
 origins = [
@@ -61,47 +108,198 @@ class QueueRequest(BaseModel):
     company_name: Optional[str] = "the company"
     tone: Optional[str] = "professional"
 
+# Jobs by the hash of their inputs, most recent last, as (task_id, queued_at)
+_recent_jobs: OrderedDict[str, tuple[str, float]] = OrderedDict()
+_RECENT_JOBS_MAX = 256
+
+# Lookups/enqueues in progress by job key, so concurrent duplicates wait for the first
+_pending_jobs: dict[str, asyncio.Task] = {}
+
 # Utility functions
-def get_resume_content() -> str:
-    """Read the default resume content."""
-    resume_path = Path("input/resume.md")
-    if not resume_path.exists():
-        raise FileNotFoundError("Default resume.md not found in input/ directory")
-    return read_file_util(str(resume_path))
+def job_key(*inputs) -> str:
+    """Hash the inputs that determine a job's output."""
+    payload = "\x00".join(str(value) for value in inputs)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
 
-def get_resume_template() -> str:
-    """Get the path to the resume template."""
-    template_path = Path("input/resume.docx")
-    if not template_path.exists():
-        raise FileNotFoundError("resume.docx not found in input/ directory")
-    return str(template_path)
+async def sse_events(generate: Callable[[Callable[[str], None]], Awaitable[dict]]) -> AsyncIterator[str]:
+    """
+    Run a generation and relay it as server-sent events.
+    
+    Each text chunk passed to the callback becomes a data event holding a
+    JSON string; the dict returned by generate follows as a "result" event,
+    or an "error" event if it fails.
+    
+    Args:
+        generate: Coroutine function taking an on_chunk callback
+    """
+    chunks = asyncio.Queue()
+    task = asyncio.create_task(generate(chunks.put_nowait))
+    task.add_done_callback(lambda _: chunks.put_nowait(None))
+    try:
+        while (chunk := await chunks.get()) is not None:
+            yield f"data: {orjson.dumps(chunk).decode()}\n\n"
+        try:
+            result = task.result()
+        except Exception as e:
+            yield f"event: error\ndata: {orjson.dumps(str(e)).decode()}\n\n"
+            return
+        yield f"event: result\ndata: {orjson.dumps(result).decode()}\n\n"
+    finally:
+        # Client went away; stop the generation (streaming calls aren't shared
+        # with other requests, so this cancels the LLM request itself)
+        task.cancel()
 
+async def resolve_job(key: str, **job) -> tuple[str, bool]:
+    """
+    Find or queue the job for a set of inputs.
+    
+    Identical inputs produce the same documents, so a recent job is handed
+    back while its result hasn't expired or failed.
+    
+    Args:
+        key: The job_key of the inputs
+        **job: Arguments for enqueue_application
+        
+    Returns:
+        Tuple of (task_id, whether an existing job was reused)
+    """
+    recent = _recent_jobs.get(key)
+    if recent is not None:
+        task_id, queued_at = recent
+        if time.monotonic() - queued_at < celery.conf.result_expires:
+            status = await asyncio.to_thread(getattr, AsyncResult(task_id, app=celery), "status")
+            if status not in ("FAILURE", "REVOKED"):
+                _recent_jobs.move_to_end(key)
+                return task_id, True
+        _recent_jobs.pop(key, None)
+
+    task = await asyncio.to_thread(enqueue_application, **job)
+    _recent_jobs[key] = (task.id, time.monotonic())
+    if len(_recent_jobs) > _RECENT_JOBS_MAX:
+        _recent_jobs.popitem(last=False)
+    return task.id, False
+
+@app.post("/generate-objective/")
+async def generate_objective(request: ObjectiveRequest):
+    """
+    Generate a career objective and suggested filename.
+    
+    Concurrent requests are coalesced into one Vertex AI batch call.
+    """
+    try:
+        objective, file_name = await generate_career_objective_async(
+            resume_content=request.resume_content,
+            job_description=request.job_description,
+            objective_length=request.objective_length,
+            tone=request.tone
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"objective": objective, "file_name": file_name}
+
+@app.post("/generate-cover-letter/")
+async def generate_cover_letter_endpoint(request: CoverLetterRequest):
+    """
+    Generate a cover letter.
+    
+    Concurrent requests are coalesced into one Vertex AI batch call.
+    """
+    try:
+        cover_letter = await generate_cover_letter_async(
+            resume_content=request.resume_content,
+            job_description=request.job_description,
+            company_name=request.company_name,
+            tone=request.tone
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"cover_letter": cover_letter}
+
+@app.post("/generate-objective/stream")
+async def stream_objective(request: ObjectiveRequest):
+    """Generate a career objective, streaming the model output as server-sent events."""
+    async def generate(on_chunk):
+        objective, file_name = await generate_career_objective_async(
+            resume_content=request.resume_content,
+            job_description=request.job_description,
+            objective_length=request.objective_length,
+            tone=request.tone,
+            on_chunk=on_chunk
+        )
+        return {"objective": objective, "file_name": file_name}
+    return StreamingResponse(sse_events(generate), media_type="text/event-stream")
+
+@app.post("/generate-cover-letter/stream")
+async def stream_cover_letter(request: CoverLetterRequest):
+    """Generate a cover letter, streaming it as server-sent events."""
+    async def generate(on_chunk):
+        cover_letter = await generate_cover_letter_async(
+            resume_content=request.resume_content,
+            job_description=request.job_description,
+            company_name=request.company_name,
+            tone=request.tone,
+            on_chunk=on_chunk
+        )
+        return {"cover_letter": cover_letter}
+    return StreamingResponse(sse_events(generate), media_type="text/event-stream")
 
 @app.post("/queue/")
 async def enqueue(request: QueueRequest, generate_cv: bool = Query(False)):
     # Minimal payload validation goes here
-    task = process_application.delay(
-        resume_content=get_resume_content(),
-        job_description=request.job_description,
-        tone=request.tone,
-        company_name=request.company_name,
-        generate_cv_flag=generate_cv or request.generate_cv,
-    )
-    return {"status": "queued", "task_id": task.id}
+    # Disk reads and the broker round-trip are blocking; keep them off the event loop
+    resume_content = await asyncio.to_thread(get_resume_content)
+    generate_cv_flag = generate_cv or request.generate_cv
+
+    # Identical submissions arriving together share one lookup/enqueue
+    key = job_key(resume_content, request.job_description, request.tone, request.company_name, generate_cv_flag)
+    pending = _pending_jobs.get(key)
+    joined = pending is not None
+    if not joined:
+        pending = _pending_jobs[key] = asyncio.create_task(resolve_job(
+            key,
+            resume_content=resume_content,
+            job_description=request.job_description,
+            tone=request.tone,
+            company_name=request.company_name,
+            generate_cv_flag=generate_cv_flag,
+        ))
+        pending.add_done_callback(lambda _: _pending_jobs.pop(key, None))
+
+    task_id, reused = await asyncio.shield(pending)
+    response = {"status": "queued", "task_id": task_id}
+    if reused or joined:
+        response["cached"] = True
+    return response
 
 @app.get("/queue/{task_id}")
 async def fetch_status(task_id: str):
-    res = AsyncResult(task_id, app=process_application.app)
-    if res.status == "PENDING":
+    res = AsyncResult(task_id, app=celery)
+    # Each lookup is a result-backend round-trip; read the state once, off the event loop
+    status = await asyncio.to_thread(getattr, res, "status")
+    if status == "PENDING":
         return {"task_id": task_id, "status": "pending"}
-    elif res.status == "STARTED":
+    elif status == "STARTED":
         return {"task_id": task_id, "status": "running"}
-    elif res.status == "SUCCESS":
-        return {"task_id": task_id, "status": "completed", "result": res.result}
-    elif res.status == "FAILURE":
-        return {"task_id": task_id, "status": "failed", "error": str(res.result)}
+    elif status == "SUCCESS":
+        return {"task_id": task_id, "status": "completed", "result": await asyncio.to_thread(getattr, res, "result")}
+    elif status == "FAILURE":
+        return {"task_id": task_id, "status": "failed", "error": str(await asyncio.to_thread(getattr, res, "result"))}
     else:
-        return {"task_id": task_id, "status": res.status}
+        return {"task_id": task_id, "status": status}
+
+@app.get("/queue/{task_id}/pdf")
+async def fetch_pdf(task_id: str):
+    """Serve the resume PDF of a completed job straight from the output directory."""
+    res = AsyncResult(task_id, app=celery)
+    status = await asyncio.to_thread(getattr, res, "status")
+    if status != "SUCCESS":
+        raise HTTPException(status_code=404, detail=f"No PDF for task {task_id} (status: {status.lower()})")
+
+    result = await asyncio.to_thread(getattr, res, "result")
+    pdf_path = result.get("resume_pdf")
+    if not pdf_path or not Path(pdf_path).exists():
+        raise HTTPException(status_code=404, detail=f"PDF for task {task_id} not found")
+    return FileResponse(pdf_path, media_type="application/pdf", filename=Path(pdf_path).name)
 
 # @app.post("/queue/")
 # async def process_job_application(
@@ -185,22 +383,36 @@ async def read_root():
     return {
         "message": "Welcome to Resume AI API",
         "endpoints": [
-            "POST /queue/?generate_cv=true - Process a job application (resume + optional cover letter)"
+            "POST /generate-objective/ - Generate a career objective",
+            "POST /generate-cover-letter/ - Generate a cover letter",
+            "POST /generate-objective/stream - Stream a career objective (server-sent events)",
+            "POST /generate-cover-letter/stream - Stream a cover letter (server-sent events)",
+            "POST /queue/?generate_cv=true - Process a job application (resume + optional cover letter)",
+            "GET /queue/{task_id}/pdf - Download the generated resume PDF"
         ]
     }
 
-def run_api(host: str = "0.0.0.0", port: int = 8000):
-    """Run the FastAPI server."""
-    uvicorn.run("main:app", host=host, port=port, reload=True)
-
-# Ensure required directories exist
-ensure_directory(Path("input"))
-ensure_directory(Path("generated"))
+def run_api(host: str = "0.0.0.0", port: int = 8000, reload: bool = False):
+    """
+    Run the FastAPI server.
+    
+    Serves on uvloop and httptools with WEB_CONCURRENCY worker processes
+    (default 4). With reload, a single auto-reloading process is used instead.
+    """
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=1 if reload else int(os.getenv("WEB_CONCURRENCY", "4")),
+        reload=reload
+    )
 
 # This file is meant to be run with uvicorn directly or imported as a module
 # To run the API server: uvicorn main:app --reload
-# For production: uvicorn main:app --host 0.0.0.0 --port 8000
+# For production: python cmd.py api (uvloop, httptools and WEB_CONCURRENCY workers)
 
 if __name__ == "__main__":
     # For backward compatibility, run the API server directly
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    run_api()
\ No newline at end of file
@@ -1,8 +1,15 @@
 """Utility functions for the Resume AI application."""
+import functools
 from pathlib import Path
 import re
 from typing import Optional, Tuple, Dict, Any
 import os
+import uuid
+import tiktoken
+
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+# A run of non-word characters: group 1 matches when it holds a space or hyphen
+_FILENAME_CLEAN_RE = re.compile(r'(\W*[-\s]\W*)|\W+')
 
 def ensure_extension(file_path: str, extension: str) -> str:
     """Ensure the file has the specified extension.
@@ -32,14 +39,20 @@ def get_unique_filename(directory: str, base_name: str, extension: str) -> str:
     if not extension.startswith('.'):
         extension = f'.{extension}'
         
-    counter = 1
-    file_path = Path(directory) / f"{base_name}{extension}"
+    # List the directory once instead of probing each candidate name
+    try:
+        with os.scandir(directory) as entries:
+            existing = {entry.name for entry in entries}
+    except FileNotFoundError:
+        existing = set()
     
-    while file_path.exists():
-        file_path = Path(directory) / f"{base_name}_{counter}{extension}"
-        counter += 1
+    file_name = f"{base_name}{extension}"
+    if file_name in existing:
+        numbered = re.compile(rf'{re.escape(base_name)}_(\d+){re.escape(extension)}')
+        counters = [int(match.group(1)) for match in map(numbered.fullmatch, existing) if match]
+        file_name = f"{base_name}_{max(counters, default=0) + 1}{extension}"
         
-    return str(file_path)
+    return str(Path(directory) / file_name)
 
 def clean_text_for_filename(text: str) -> str:
     """Clean text to be used in a filename.
@@ -50,10 +63,9 @@ def clean_text_for_filename(text: str) -> str:
     Returns:
         Cleaned text suitable for a filename
     """
-    # Remove special characters and replace spaces with hyphens
-    cleaned = re.sub(r'[^\w\s-]', '', text.lower())
-    # Replace spaces and multiple hyphens with a single hyphen
-    cleaned = re.sub(r'[-\s]+', '-', cleaned)
+    # In one pass, drop special characters and turn each run of spaces and
+    # hyphens (with any special characters in it) into a single hyphen
+    cleaned = _FILENAME_CLEAN_RE.sub(lambda match: '-' if match.group(1) else '', text.lower())
     # Remove leading/trailing hyphens
     return cleaned.strip('-')
 
@@ -79,7 +91,112 @@ def read_file(file_path: str) -> str:
         IOError: If there's an error reading the file
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        return Path(file_path).read_text(encoding='utf-8')
     except Exception as e:
         raise IOError(f"Error reading file {file_path}: {str(e)}")
+
+def read_file_cached(file_path: str) -> str:
+    """Read content from a file, reusing the last read while the file is unchanged.
+    
+    The cache is keyed by path and modification time, so editing the file
+    invalidates it.
+    
+    Args:
+        file_path: Path to the file to read
+        
+    Returns:
+        The file contents
+        
+    Raises:
+        IOError: If the file doesn't exist or there's an error reading it
+    """
+    try:
+        mtime_ns = os.stat(file_path).st_mtime_ns
+    except OSError as e:
+        raise IOError(f"Error reading file {file_path}: {str(e)}")
+    return _read_file_at(file_path, mtime_ns)
+
+@functools.lru_cache(maxsize=4)
+def _read_file_at(file_path: str, mtime_ns: int) -> str:
+    return read_file(file_path)
+
+def read_bytes_cached(file_path: str) -> bytes:
+    """Read a binary file, reusing the last read while the file is unchanged.
+    
+    Args:
+        file_path: Path to the file to read
+        
+    Returns:
+        The file contents
+        
+    Raises:
+        IOError: If the file doesn't exist or there's an error reading it
+    """
+    try:
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        return _read_bytes_at(file_path, mtime_ns)
+    except OSError as e:
+        raise IOError(f"Error reading file {file_path}: {str(e)}")
+
+@functools.lru_cache(maxsize=4)
+def _read_bytes_at(file_path: str, mtime_ns: int) -> bytes:
+    return Path(file_path).read_bytes()
+
+
+def write_file_atomic(file_path: str, content: bytes | str) -> None:
+    """Write content to a file atomically.
+    
+    The content is written to a temporary file next to the target and then
+    moved into place, so readers never see a partially written file.
+    
+    Args:
+        file_path: Path to the file to write
+        content: The bytes or text (UTF-8 encoded) to write
+    """
+    path = Path(file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def squeeze_blank_lines(text: str) -> str:
+    """Collapse runs of blank lines into a single blank line.
+    
+    Args:
+        text: The text to clean
+        
+    Returns:
+        The text with at most one consecutive blank line
+    """
+    return _BLANK_LINES_RE.sub('\n\n', text)
+
+@functools.lru_cache(maxsize=1)
+def _token_encoding() -> tiktoken.Encoding:
+    return tiktoken.get_encoding('cl100k_base')
+
+def token_trim(text: str, max_tokens: int) -> str:
+    """Trim text to at most max_tokens tokens.
+    
+    Args:
+        text: The text to trim
+        max_tokens: Maximum number of tokens to keep
+        
+    Returns:
+        The text, cut after max_tokens tokens if it was longer
+    """
+    # Every token covers at least one byte (a CJK character or emoji can
+    # take several tokens, so counting characters is not enough)
+    if len(text.encode('utf-8')) <= max_tokens:
+        return text
+    encoding = _token_encoding()
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    # The cut can fall inside a multi-byte character, which decodes as U+FFFD
+    return encoding.decode(tokens[:max_tokens]).rstrip('\ufffd')
@@ -1,8 +1,22 @@
+import functools
 from pathlib import Path
+from utils import read_file_cached
 
+@functools.lru_cache(maxsize=1)
 def get_resume_template() -> str:
-    """Get the path to the resume template."""
+    """Get the path to the resume template.
+    
+    The path is resolved and checked once per process; a later change to the
+    file itself is still picked up by the mtime-keyed template cache.
+    """
     template_path = Path("input/resume.docx")
     if not template_path.exists():
         raise FileNotFoundError("resume.docx not found in input/ directory")
-    return str(template_path)
\ No newline at end of file
+    return str(template_path.resolve())
+
+def get_resume_content() -> str:
+    """Read the default resume content."""
+    resume_path = Path("input/resume.md")
+    if not resume_path.exists():
+        raise FileNotFoundError("Default resume.md not found in input/ directory")
+    return read_file_cached(str(resume_path))
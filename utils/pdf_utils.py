@@ -1,10 +1,211 @@
+import contextlib
+import fcntl
+import functools
+import shutil
 import subprocess
 import re
 import sys
 import os
+import tempfile
+import threading
+import time
 from pathlib import Path
 from typing import Optional
 
+try:
+    from unoserver.client import UnoClient
+except ImportError:  # unoserver is optional; conversions then spawn soffice per call
+    UnoClient = None
+
+# Set UNOSERVER_ENABLED=true to convert through a long-lived headless
+# LibreOffice (unoserver) instead of starting soffice for every document
+UNOSERVER_ENABLED = os.getenv("UNOSERVER_ENABLED", "false").lower() in ("1", "true", "yes")
+UNOSERVER_HOST = os.getenv("UNOSERVER_HOST", "127.0.0.1")
+UNOSERVER_PORT = os.getenv("UNOSERVER_PORT", "2003")
+# Number of daemons to run; they listen on consecutive ports from UNOSERVER_PORT
+UNOSERVER_POOL_SIZE = int(os.getenv("UNOSERVER_POOL_SIZE", "1"))
+UNOSERVER_PORTS = [str(int(UNOSERVER_PORT) + i) for i in range(UNOSERVER_POOL_SIZE)]
+# How often supervise_unoserver_pool checks for daemons that have exited
+UNOSERVER_CHECK_SECONDS = float(os.getenv("UNOSERVER_CHECK_SECONDS", "10"))
+
+# A conversion holds an exclusive lock on its daemon's lock file, so each
+# LibreOffice instance only ever handles one document at a time, even when
+# the conversions come from different (e.g. prefork) worker processes
+_LOCK_DIR = Path(tempfile.gettempdir())
+_CHECKOUT_POLL_SECONDS = 0.05
+
+
+@contextlib.contextmanager
+def _checkout_port():
+    """Lock the port of an idle daemon for the duration of the block, waiting for one if needed."""
+    while True:
+        for port in UNOSERVER_PORTS:
+            fd = os.open(_LOCK_DIR / f"unoserver-{UNOSERVER_HOST}-{port}.lock", os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            try:
+                yield port
+            finally:
+                # Closing the descriptor releases the lock
+                os.close(fd)
+            return
+        time.sleep(_CHECKOUT_POLL_SECONDS)
+
+
+def convert_to_pdf(source_path: str, output_dir: str, pdf_name: str) -> str:
+    """Convert a document to PDF, preferring the unoserver daemon when enabled.
+    
+    Falls back to a one-shot LibreOffice process if the daemon is disabled,
+    not installed or the conversion through it fails.
+    
+    Args:
+        source_path: Path to the source document
+        output_dir: Directory where the PDF will be saved
+        pdf_name: File name of the generated PDF
+        
+    Returns:
+        Path to the generated PDF file
+    """
+    if UNOSERVER_ENABLED and UnoClient is not None:
+        try:
+            return convert_to_pdf_unoserver(source_path, output_dir, pdf_name)
+        except Exception as e:
+            print(f"unoserver conversion failed, falling back to soffice: {e}")
+    return convert_to_pdf_libreoffice(source_path, output_dir, pdf_name)
+
+
+def convert_to_pdf_unoserver(source_path: str, output_dir: str, pdf_name: str) -> str:
+    """Convert a document to PDF through a running unoserver instance.
+    
+    Blocks until one of the UNOSERVER_POOL_SIZE daemons is idle.
+    
+    Args:
+        source_path: Path to the source document
+        output_dir: Directory where the PDF will be saved
+        pdf_name: File name of the generated PDF
+        
+    Returns:
+        Path to the generated PDF file
+        
+    Raises:
+        FileNotFoundError: If the source document does not exist
+        ConnectionError: If unoserver is not reachable
+    """
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"Source file not found: {source_path}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    pdf_path = os.path.join(output_dir, pdf_name)
+
+    with _checkout_port() as port:
+        # Absolute paths, since the daemon does not share our working directory
+        client = UnoClient(server=UNOSERVER_HOST, port=port)
+        client.convert(
+            inpath=os.path.abspath(source_path),
+            outpath=os.path.abspath(pdf_path),
+            convert_to='pdf'
+        )
+    return pdf_path
+
+
+def start_unoserver(port: str = UNOSERVER_PORT) -> subprocess.Popen:
+    """Start a long-lived headless LibreOffice behind unoserver.
+    
+    Args:
+        port: Port unoserver listens on; LibreOffice's own UNO port is
+            port + UNOSERVER_POOL_SIZE, so the UNO ports of a pool follow
+            its unoserver ports without overlapping them
+        
+    Returns:
+        The unoserver process; stop it with stop_unoserver
+        
+    Raises:
+        FileNotFoundError: If the unoserver executable is not installed
+    """
+    # unoserver gives each instance its own temporary LibreOffice profile
+    # (and removes it on exit), so instances don't hand work to each other
+    return subprocess.Popen(
+        [
+            'unoserver',
+            '--interface', UNOSERVER_HOST,
+            '--port', port,
+            '--uno-port', str(int(port) + UNOSERVER_POOL_SIZE)
+        ],
+        stdout=subprocess.DEVNULL
+    )
+
+
+def stop_unoserver(process: subprocess.Popen, timeout: float = 10) -> None:
+    """Stop a unoserver started by start_unoserver.
+    
+    Also reaps a process that has already exited.
+    
+    Args:
+        process: The unoserver process
+        timeout: Seconds to wait for it to exit before killing it
+    """
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def stop_unoserver_pool(processes: list[subprocess.Popen]) -> None:
+    """Stop every unoserver of a pool started by start_unoserver_pool."""
+    for process in processes:
+        stop_unoserver(process)
+
+
+def start_unoserver_pool() -> list[subprocess.Popen]:
+    """Start one unoserver per port in UNOSERVER_PORTS.
+    
+    Returns:
+        The unoserver processes; terminate them on shutdown
+        
+    Raises:
+        FileNotFoundError: If the unoserver executable is not installed
+    """
+    return [start_unoserver(port) for port in UNOSERVER_PORTS]
+
+
+def supervise_unoserver_pool(
+    processes: list[subprocess.Popen],
+    stop: threading.Event,
+    interval: float = UNOSERVER_CHECK_SECONDS
+) -> threading.Thread:
+    """Restart pool daemons that exit (e.g. a LibreOffice crash) in a background thread.
+    
+    Must run in the process that started the pool, since only it can poll
+    the daemons. Restarted processes replace the old ones in processes.
+    
+    Args:
+        processes: The pool from start_unoserver_pool, one per port in UNOSERVER_PORTS
+        stop: Set this to stop supervising, before terminating the pool
+        interval: Seconds between checks
+        
+    Returns:
+        The supervisor thread
+    """
+    def supervise():
+        while not stop.wait(interval):
+            for i, process in enumerate(processes):
+                if process.poll() is None:
+                    continue
+                port = UNOSERVER_PORTS[i]
+                print(f"unoserver on port {port} exited with code {process.returncode}, restarting it")
+                stop_unoserver(process)
+                # Conversions on this port fall back to soffice until it is up again
+                processes[i] = start_unoserver(port)
+
+    thread = threading.Thread(target=supervise, name="unoserver-supervisor", daemon=True)
+    thread.start()
+    return thread
+
 
 def convert_to_pdf_libreoffice(source_path: str, output_dir: str, pdf_name: str) -> str:
     """Convert a document to PDF using LibreOffice.
@@ -70,9 +271,13 @@ def convert_to_pdf_libreoffice(source_path: str, output_dir: str, pdf_name: str)
         raise TimeoutError("PDF conversion timed out")
 
 
+@functools.lru_cache(maxsize=1)
 def libreoffice_exec() -> str:
     """Get the path to the LibreOffice executable.
     
+    The lookup runs once per process; candidates are first looked up on the
+    PATH, and only started with --version if none is found there.
+    
     Returns:
         Path to the LibreOffice executable
         
@@ -88,6 +293,11 @@ def libreoffice_exec() -> str:
     else:
         paths = ['libreoffice', 'soffice', 'libreoffice7.6']
     
+    for path in paths:
+        resolved = shutil.which(path)
+        if resolved is not None:
+            return resolved
+    
     for path in paths:
         try:
             subprocess.run([path, '--version'], 